@@ -0,0 +1,60 @@
+"""Time the import of each ambrosial package in a fresh interpreter.
+
+Also lists the heavy third-party libraries each import pulls in, which should
+only load once a feature that needs them runs.
+
+    python benchmarks/import_time.py [--repeat N]
+"""
+import argparse
+import json
+import statistics as st
+import subprocess
+import sys
+
+MODULES = ("ambrosial.swiggy", "ambrosial.swan", "ambrosial.swich")
+HEAVY = (
+    "browser_cookie3",
+    "requests",
+    "numpy",
+    "pandas",
+    "scipy",
+    "matplotlib",
+    "seaborn",
+    "folium",
+    "july",
+    "palettable",
+    "stylecloud",
+    "pyarrow",
+)
+SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [m for m in {heavy!r} if m in sys.modules]]))
+"""
+
+
+def measure(module: str) -> tuple[float, list[str]]:
+    code = SNIPPET.format(module=module, heavy=HEAVY)
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout
+    elapsed, loaded = json.loads(out)
+    return elapsed, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'module':<20}{'min ms':>10}{'median ms':>12}  heavy imports")
+    for module in MODULES:
+        runs = [measure(module) for _ in range(args.repeat)]
+        times = [elapsed * 1000 for elapsed, _ in runs]
+        loaded = ", ".join(runs[0][1]) or "-"
+        print(f"{module:<20}{min(times):>10.1f}{st.median(times):>12.1f}  {loaded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from functools import cached_property
 from typing import Optional
 
 from ambrosial.swan.addresses import AddressAnalytics
@@ -6,6 +7,7 @@ from ambrosial.swan.offers import OfferAnalytics, PaymentAnalytics
 from ambrosial.swan.orders import OrderAnalytics
 from ambrosial.swan.restaurants import RestaurantAnalytics
 from ambrosial.swiggy import Swiggy
+from ambrosial.swiggy.datamodel.order import Order
 
 
 class SwiggyAnalytics:
@@ -13,12 +15,50 @@ class SwiggyAnalytics:
         self.swiggy = Swiggy() if swiggy is None else swiggy
         if self.swiggy._fetched is False:
             self.swiggy.loadb()
-        self.orders = OrderAnalytics(self.swiggy)
-        self.offers = OfferAnalytics(self.swiggy)
-        self.items = ItemAnalytics(self.swiggy)
-        self.restaurants = RestaurantAnalytics(self.swiggy)
-        self.addresses = AddressAnalytics(self.swiggy)
-        self.payments = PaymentAnalytics(self.swiggy)
+
+    # Each analytics converts the orders it needs when first used.
+    @cached_property
+    def orders(self) -> OrderAnalytics:
+        return OrderAnalytics(self.swiggy)
+
+    @cached_property
+    def offers(self) -> OfferAnalytics:
+        return OfferAnalytics(self.swiggy)
+
+    @cached_property
+    def items(self) -> ItemAnalytics:
+        return ItemAnalytics(self.swiggy)
+
+    @cached_property
+    def restaurants(self) -> RestaurantAnalytics:
+        return RestaurantAnalytics(self.swiggy)
+
+    @cached_property
+    def addresses(self) -> AddressAnalytics:
+        return AddressAnalytics(self.swiggy)
+
+    @cached_property
+    def payments(self) -> PaymentAnalytics:
+        return PaymentAnalytics(self.swiggy)
+
+    def apply_new_orders(self, orders: list[Order]) -> None:
+        """Fold `orders` into every analytics, instead of building them again.
+
+        `orders` must be newer than every order analysed so far, as the ones added
+        by ``swiggy.fetch_orders(incremental=True)``: the first ones returned by
+        ``swiggy.get_orders()``.
+        """
+        # the analytics not built yet will be built from the new orders as well
+        for name in (
+            "orders",
+            "offers",
+            "items",
+            "restaurants",
+            "addresses",
+            "payments",
+        ):
+            if name in self.__dict__:
+                self.__dict__[name].apply_new_orders(orders)
 
     def __repr__(self) -> str:
         return f"SwiggyAnalytics({self.swiggy})"
@@ -3,19 +3,33 @@ from collections import Counter, defaultdict
 from typing import Any, Optional
 
 import ambrosial.swan.typealiases as alias
+from ambrosial.swan.memo import carry_over, memoized
 from ambrosial.swiggy import Swiggy
 from ambrosial.swiggy.datamodel.address import Address
 from ambrosial.swiggy.datamodel.order import Order
+from ambrosial.swiggy.datamodel.record import OrderRecord
 
 
 class AddressAnalytics:
     def __init__(self, swiggy: Swiggy) -> None:
         self.swiggy: Swiggy = swiggy
         self.all_orders: list[Order] = self.swiggy.get_orders()
+        self.all_records: list[OrderRecord] = self.swiggy.get_records()
         self.all_addresses: list[Address] = self.swiggy.get_addresses()
 
+    def apply_new_orders(self, orders: list[Order]) -> None:
+        """Fold the addresses of `orders`, newer than every order analysed so far."""
+        # `orders` are the first ones of `swiggy`, their records are converted already
+        self.all_orders[:0] = orders
+        self.all_records[:0] = self.swiggy.get_records()[: len(orders)]
+        self.all_addresses[:0] = [order.address for order in orders]
+        carry_over(self)
+
     def group(self) -> dict[Address, int]:
-        return dict(Counter(self.all_addresses).most_common())
+        return {
+            entity.model: entity.count
+            for entity in self.swiggy.get_distinct_addresses(ranked=True)
+        }
 
     def grouped_count(self, group_by: str) -> dict[str, int]:
         return dict(
@@ -31,36 +45,41 @@ class AddressAnalytics:
                 group_dict[getattr(address, key)].append(address)
         return dict(group_dict)
 
+    @memoized
     def coordinates(self) -> list[alias.Coordindates]:
         return [
             alias.Coordindates(
-                id_version=f"{address.address_id}_{address.version}",
-                annotation=address.annotation,
-                latitude=address.lat,
-                longitude=address.lng,
+                id_version=f"{entity.model.address_id}_{entity.model.version}",
+                annotation=entity.model.annotation,
+                latitude=entity.model.lat,
+                longitude=entity.model.lng,
             )
-            for address in set(self.all_addresses)
+            for entity in self.swiggy.get_distinct_addresses()
         ]
 
+    @memoized
     def order_history(self) -> defaultdict[str, list[alias.OrderHistory]]:
         hist = defaultdict(list)
-        for order in self.all_orders:
-            hist[self._get_key(order)].append(
+        for record in self.all_records:
+            hist[self._get_key(record)].append(
                 alias.OrderHistory(
-                    order_id=order.order_id,
-                    order_time=order.order_time,
+                    order_id=record.order_id,
+                    order_time=record.order_time,
                 )
             )
         return hist
 
+    @memoized
     def delivery_time_stats(
         self,
         unit: str = "minute",
     ) -> dict[str, alias.DeliveryTimeStats]:
         delivery_time = defaultdict(list)
-        for order in self.all_orders:
-            if (dt := order.delivery_time_in_seconds) != 0:
-                delivery_time[self._get_key(order)].append(dt / self._conv_factor(unit))
+        for record in self.all_records:
+            if (dt := record.delivery_time_in_seconds) != 0:
+                delivery_time[self._get_key(record)].append(
+                    dt / self._conv_factor(unit)
+                )
         return {
             address: alias.DeliveryTimeStats(
                 mean=round(st.mean(total_dt), 4),
@@ -73,11 +92,11 @@ class AddressAnalytics:
             for address, total_dt in delivery_time.items()
         }
 
-    def _get_key(self, order: Order) -> str:
-        return str(
-            f"{order.address.address_id}_{order.address.version}"
+    def _get_key(self, record: OrderRecord) -> str:
+        return (
+            f"{record.address_id}_{record.address_version}"
             if self.swiggy.ddav
-            else order.address.address_id  # because address_id is int
+            else record.address_id
         )
 
     def _conv_factor(self, unit: str) -> int:
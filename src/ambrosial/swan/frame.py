@@ -0,0 +1,223 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Optional
+
+import numpy as np
+
+from ambrosial.swiggy.datamodel.record import OrderRecord
+
+STRFTIME = {
+    "minute": "%M",
+    "hour": "%H",
+    "day": "%d",
+    "week": "%w",
+    "week_": "%A",
+    "calweek": "%U",
+    "month": "%m",
+    "month_": "%B",
+    "year": "%Y",
+    "per_minute_": "%Y %B %d %H %M",
+    "per_minute": "%Y %m %d %H %M",
+    "per_hour_": "%Y %B %d %H",
+    "per_hour": "%Y %m %d %H",
+    "per_day_": "%Y %B %d",
+    "per_day": "%Y %m %d",
+}
+
+
+class BinSpec:
+    """A parsed bins string such as ``"year+month_"``, see `compile_bins()`."""
+
+    def __init__(self, bins: str) -> None:
+        # cannot use set() as it doesnot preserve order
+        self.components = tuple(dict.fromkeys(attr for attr in bins.split("+") if attr))
+        if any((x := attr) not in STRFTIME for attr in self.components):
+            raise KeyError(
+                f"Invalid grouping key: {repr(x)}. "
+                f"Available keys: {repr(list(STRFTIME))}"
+            )
+        self.format = " ".join(STRFTIME[attr] for attr in self.components)
+
+    def codes(self, frame: "OrderFrame") -> np.ndarray:
+        """Integer key of each order of `frame`, one column per component."""
+        if not self.components:
+            return np.zeros((len(frame), 1), np.int64)
+        return np.stack([CODES[attr](frame) for attr in self.components], axis=1)
+
+    def label(self, order_time: datetime) -> str:
+        return order_time.strftime(self.format)
+
+
+@lru_cache(maxsize=None)
+def compile_bins(bins: str) -> BinSpec:
+    return BinSpec(bins)
+
+
+class Bins:
+    """Orders of an `OrderFrame` binned on time, bins in chronological order."""
+
+    def __init__(self, labels: list[str], keys: np.ndarray, index: np.ndarray) -> None:
+        self.labels = labels
+        # codes of each bin, see `BinSpec.codes()`
+        self.keys = keys
+        # bin of each order
+        self.index = index
+        self.count = len(labels)
+        self._rows: Optional[list[np.ndarray]] = None
+
+    def rows(self) -> list[np.ndarray]:
+        """Row numbers of the orders in each bin, in the order of the frame."""
+        if self._rows is None:
+            rows = np.argsort(self.index, kind="stable")
+            sizes = np.bincount(self.index, minlength=self.count)
+            self._rows = np.split(rows, np.cumsum(sizes)[:-1])
+        return self._rows
+
+
+# one-dimensional columns of `OrderFrame`
+COLUMNS = (
+    "order_id",
+    "order_time",
+    "order_total",
+    "delivery_time",
+    "sla_time",
+    "actual_sla_time",
+    "on_time",
+    "distance",
+    "cancelled",
+    "year",
+    "month",
+    "day",
+    "hour",
+    "minute",
+    "weekday",
+    "yearday",
+)
+
+
+class OrderFrame:
+    """Columns of the orders as NumPy arrays, rows in the order of `records`."""
+
+    def __init__(self, records: list[OrderRecord]) -> None:
+        self.records = records
+        n = len(records)
+        self.order_id = np.fromiter((r.order_id for r in records), np.int64, n)
+        self.order_time = np.array(
+            [r.order_time for r in records], dtype="datetime64[s]"
+        )
+        self.order_total = np.fromiter((r.order_total for r in records), np.int64, n)
+        self.delivery_time = np.fromiter(
+            (r.delivery_time_in_seconds for r in records), np.int64, n
+        )
+        self.sla_time = np.fromiter((r.sla_time for r in records), np.int64, n)
+        self.actual_sla_time = np.fromiter(
+            (r.actual_sla_time for r in records), np.int64, n
+        )
+        self.on_time = np.fromiter((r.on_time for r in records), bool, n)
+        self.distance = np.fromiter((r.distance for r in records), np.float64, n)
+        self.cancelled = np.fromiter(
+            (r.cancellation_time != 0 for r in records), bool, n
+        )
+        # charge names in the order they first appear in
+        self.charge_names = list(
+            dict.fromkeys(name for r in records for name in r.charges)
+        )
+        column = {name: i for i, name in enumerate(self.charge_names)}
+        self.charges = np.zeros((n, len(self.charge_names)))
+        for i, record in enumerate(records):
+            for name, value in record.charges.items():
+                self.charges[i, column[name]] = value
+        self._datetime_fields()
+        self._bins: dict[BinSpec, Bins] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def bins(self, spec: BinSpec) -> Bins:
+        """Bin the orders on the components of `spec`, labels formatted once per bin.
+
+        Binnings are cached, the frame doesn't change once built.
+        """
+        if spec not in self._bins:
+            keys, first, index = np.unique(
+                spec.codes(self), axis=0, return_index=True, return_inverse=True
+            )
+            labels = [spec.label(self.records[row].order_time) for row in first]
+            self._bins[spec] = Bins(labels, keys, index.reshape(-1))
+        return self._bins[spec]
+
+    def prepend(self, records: list[OrderRecord]) -> "OrderFrame":
+        """A frame of `records` followed by the orders of this frame.
+
+        Only `records` are read, and the cached binnings are carried over with only
+        the bins new to them formatted.
+        """
+        new = OrderFrame(records)
+        frame = OrderFrame.__new__(OrderFrame)
+        frame.records = records + self.records
+        for column in COLUMNS:
+            setattr(
+                frame,
+                column,
+                np.concatenate([getattr(new, column), getattr(self, column)]),
+            )
+        frame.charge_names = list(dict.fromkeys(new.charge_names + self.charge_names))
+        frame.charges = np.zeros((len(frame.records), len(frame.charge_names)))
+        for part, rows in ((new, slice(None, len(new))), (self, slice(len(new), None))):
+            cols = [frame.charge_names.index(name) for name in part.charge_names]
+            frame.charges[rows, cols] = part.charges
+        frame._bins = {}
+        for spec, bins in self._bins.items():
+            keys, first, inverse = np.unique(
+                np.concatenate([bins.keys, spec.codes(new)]),
+                axis=0,
+                return_index=True,
+                return_inverse=True,
+            )
+            inverse = inverse.reshape(-1)
+            labels = [
+                bins.labels[row]
+                if row < bins.count
+                else spec.label(records[row - bins.count].order_time)
+                for row in first
+            ]
+            index = np.concatenate(
+                [inverse[bins.count :], inverse[: bins.count][bins.index]]
+            )
+            frame._bins[spec] = Bins(labels, keys, index)
+        return frame
+
+    def _datetime_fields(self) -> None:
+        days = self.order_time.astype("datetime64[D]")
+        months = self.order_time.astype("datetime64[M]")
+        years = self.order_time.astype("datetime64[Y]")
+        seconds = (self.order_time - days).astype(np.int64)
+        self.year = years.astype(np.int64) + 1970
+        self.month = months.astype(np.int64) % 12 + 1
+        self.day = (days - months).astype(np.int64) + 1
+        self.hour = seconds // 3600
+        self.minute = seconds // 60 % 60
+        # "%w": Sunday is 0, 1970-01-01 was a Thursday
+        self.weekday = (days.astype(np.int64) + 4) % 7
+        self.yearday = (days - years).astype(np.int64)
+
+
+# Integer code of each bin component. Codes sort in the same order as the
+# zero-padded `strftime` strings they stand for, e.g. "%Y %m %d" for "per_day".
+CODES: dict[str, Callable[["OrderFrame"], np.ndarray]] = {
+    "minute": lambda f: f.minute,
+    "hour": lambda f: f.hour,
+    "day": lambda f: f.day,
+    "week": lambda f: f.weekday,
+    "week_": lambda f: f.weekday,
+    "calweek": lambda f: (f.yearday + 7 - f.weekday) // 7,
+    "month": lambda f: f.month,
+    "month_": lambda f: f.month,
+    "year": lambda f: f.year,
+    "per_minute_": lambda f: f.order_time.astype("datetime64[m]").astype(np.int64),
+    "per_minute": lambda f: f.order_time.astype("datetime64[m]").astype(np.int64),
+    "per_hour_": lambda f: f.order_time.astype("datetime64[h]").astype(np.int64),
+    "per_hour": lambda f: f.order_time.astype("datetime64[h]").astype(np.int64),
+    "per_day_": lambda f: f.order_time.astype("datetime64[D]").astype(np.int64),
+    "per_day": lambda f: f.order_time.astype("datetime64[D]").astype(np.int64),
+}
@@ -1,8 +1,11 @@
 from collections import Counter, defaultdict
+from functools import cached_property
 from itertools import groupby
 from typing import Any, Literal, Optional
 
 import ambrosial.swan.typealiases as alias
+from ambrosial.swan.memo import carry_over, memoized
+from ambrosial.swan.search import SearchIndex, SearchMode
 from ambrosial.swiggy import Swiggy
 from ambrosial.swiggy.datamodel.item import Item
 from ambrosial.swiggy.datamodel.order import Order
@@ -12,10 +15,35 @@ class ItemAnalytics:
     def __init__(self, swiggy: Swiggy) -> None:
         self.swiggy = swiggy
         self.all_items = self.swiggy.get_items()
-        self.items_map = self._get_items_map()
+        self.items_map = self._get_items_map(self.all_items)
+
+    def apply_new_orders(self, orders: list[Order]) -> None:
+        """Fold the items of `orders`, newer than every order analysed so far."""
+        items = [item for order in orders for item in order.items]
+        self.all_items[:0] = items
+        self.__dict__.pop("_name_index", None)
+        new_map = self._get_items_map(items)
+        self.items_map = dict(
+            sorted(
+                {
+                    **self.items_map,
+                    **{
+                        item_id: instances + self.items_map.get(item_id, [])
+                        for item_id, instances in new_map.items()
+                    },
+                }.items()
+            )
+        )
+        carry_over(
+            self,
+            summarise=lambda summary, item_id: None if item_id in new_map else summary,
+        )
 
     def group(self) -> dict[Item, int]:
-        return dict(Counter(self.all_items).most_common())
+        return {
+            entity.model: entity.count
+            for entity in self.swiggy.get_distinct_items(ranked=True)
+        }
 
     def grouped_count(self, group_by: str) -> dict[Any, int]:
         if group_by == "item_charges":
@@ -46,6 +74,7 @@ class ItemAnalytics:
             for order_id in self.swiggy.cache.items[str(item_id)]
         ]
 
+    @memoized
     def summarise(self, item_id: int) -> alias.ItemSummary:
         """
         total_actual_cost & avg_actual_cost inlcudes GST but excludes
@@ -80,12 +109,25 @@ class ItemAnalytics:
             received_for_free=received_for_free,
         )
 
-    def search_item(self, name: str, exact: bool = True) -> list[Item]:
-        if exact:
-            return [
-                item for item in self.all_items if name.lower() == item.name.lower()
-            ]
-        return [item for item in self.all_items if name.lower() in item.name.lower()]
+    def search_item(
+        self, name: str, exact: bool = True, mode: Optional[SearchMode] = None
+    ) -> list[Item]:
+        """Items named `name`, or whose name starts with or contains it as per `mode`.
+
+        Without `mode`, `exact` picks between "exact" and "substring" matches.
+        """
+        mode = mode or ("exact" if exact else "substring")
+        positions = self._name_index.search(name, mode)
+        return [self.all_items[position] for position in positions]
+
+    def suggest_item(self, name: str, limit: int = 10) -> list[str]:
+        """Up to `limit` distinct (lowercased) item names ranked by how closely they
+        match `name`, tolerating typos."""
+        return self._name_index.fuzzy(name, limit)
+
+    @cached_property
+    def _name_index(self) -> SearchIndex:
+        return SearchIndex([item.name] for item in self.all_items)
 
     def _is_valid_id(self, item_id: int) -> Literal[True]:
         if item_id in self.items_map:
@@ -111,6 +153,6 @@ class ItemAnalytics:
             item.category_details["category"] for item in self.all_items
         ).most_common()
 
-    def _get_items_map(self) -> dict[int, list[Item]]:
-        items = sorted(self.all_items, key=lambda x: x.item_id)
+    def _get_items_map(self, items: list[Item]) -> dict[int, list[Item]]:
+        items = sorted(items, key=lambda x: x.item_id)
         return {item.item_id: list(grped_vals) for item, grped_vals in groupby(items)}
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from copy import copy
+from functools import wraps
+from inspect import signature
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+MAXSIZE = 128
+
+
+def memoized(method: F) -> F:
+    """Cache the results of an analytics `method` per instance, least recently used
+    results are dropped past `MAXSIZE`.
+
+    Results are keyed by method and arguments, and thrown away once the data
+    version of the instance's `swiggy` changes, unless `apply_new_orders()` carries
+    them over (see `carry_over()`). Callers get a copy of the dicts and lists of a
+    result, so mutating it leaves the cached one as it was.
+    """
+    sig = signature(method)
+
+    @wraps(method)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        bound = sig.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        # the first argument is the instance itself
+        arguments = list(bound.arguments.values())[1:]
+        key = (method.__name__, *(_freeze(arg) for arg in arguments))
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        memo = _memo(self)
+        if key in memo:
+            memo.move_to_end(key)
+        else:
+            memo[key] = method(self, *args, **kwargs)
+            if len(memo) > MAXSIZE:
+                memo.popitem(last=False)
+        return _copy(memo[key])
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _memo(instance: Any) -> OrderedDict[tuple, Any]:
+    version = instance.swiggy._version
+    if instance.__dict__.get("_memo_version") != version:
+        instance._memo_version = version
+        instance._memo = OrderedDict()
+    return instance._memo
+
+
+def _copy(result: Any) -> Any:
+    # Only the containers are copied, the values in them (numbers, strings, models)
+    # are immutable. Dicts keep their type, e.g. a defaultdict stays one.
+    if isinstance(result, dict):
+        copied = copy(result)
+        for key, value in copied.items():
+            copied[key] = _copy(value)
+        return copied
+    if isinstance(result, list):
+        return [_copy(value) for value in result]
+    return result
+
+
+def _freeze(arg: Any) -> Hashable:
+    # e.g. the list of metrics passed to `OrderAnalytics.aggregate()`
+    if isinstance(arg, (list, tuple)):
+        return tuple(_freeze(value) for value in arg)
+    return arg
+
+
+def carry_over(instance: Any, **rules: Callable[..., Optional[Any]]) -> None:
+    """Keep the cached results of `instance` that still hold once it is updated with
+    new orders.
+
+    `rules` are keyed by method name. Each is called with a cached result and the
+    arguments it was computed for, by name, and returns the result as of the new
+    orders, or None to drop it. Results of methods without a rule are dropped.
+    """
+    carried: OrderedDict[tuple, Any] = OrderedDict()
+    for key, result in instance.__dict__.get("_memo", {}).items():
+        name, *arguments = key
+        if (rule := rules.get(name)) is None:
+            continue
+        # the first parameter of the method is the instance itself
+        parameters = list(signature(getattr(type(instance), name)).parameters)[1:]
+        if (updated := rule(result, **dict(zip(parameters, arguments)))) is not None:
+            carried[key] = updated
+    # the carried results are as of the current version of `swiggy`
+    instance._memo_version = instance.swiggy._version
+    instance._memo = carried
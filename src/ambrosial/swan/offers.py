@@ -3,9 +3,10 @@ from collections import Counter, defaultdict
 from itertools import takewhile
 from typing import Any, NoReturn, Optional
 
+from ambrosial.swan.memo import carry_over, memoized
 from ambrosial.swan.typealiases import ExtremeDiscount, OfferStatistics
 from ambrosial.swiggy import Swiggy
-from ambrosial.swiggy.datamodel.order import Offer
+from ambrosial.swiggy.datamodel.order import Offer, Order
 
 
 class OfferAnalytics:
@@ -13,6 +14,11 @@ class OfferAnalytics:
         self.swiggy = swiggy
         self.all_offers = self.swiggy.get_offers()
 
+    def apply_new_orders(self, orders: list[Order]) -> None:
+        """Fold the offers of `orders`, newer than every order analysed so far."""
+        self.all_offers[:0] = [offer for order in orders for offer in order.offers_data]
+        carry_over(self)
+
     def group(self) -> NoReturn:
         raise NotImplementedError("Each offer is unique. Use Swiggy.get_offers()")
 
@@ -34,6 +40,7 @@ class OfferAnalytics:
                 group_dict[getattr(offer, key)].append(offer)
         return dict(group_dict)
 
+    @memoized
     def statistics(self) -> OfferStatistics:
         discounts = [offer.total_offer_discount for offer in self.all_offers]
         sorted_offers = sorted(self.all_offers, key=lambda x: x.total_offer_discount)
@@ -88,6 +95,12 @@ class PaymentAnalytics:
         self.swiggy = swiggy
         self.all_payments = self.swiggy.get_payments()
 
+    def apply_new_orders(self, orders: list[Order]) -> None:
+        """Fold the payments of `orders`, newer than every order analysed so far."""
+        self.all_payments[:0] = [
+            payment for order in orders for payment in order.payment_transaction
+        ]
+
     def group(self) -> NoReturn:
         raise NotImplementedError("Each payment is unique. Use Swiggy.get_payments()")
 
@@ -1,37 +1,38 @@
 import statistics as st
 from collections import Counter, defaultdict
 from copy import copy
-from datetime import datetime
-from itertools import groupby
-from typing import Any, NoReturn, Optional
+from functools import partial
+from typing import Any, NoReturn, Optional, Sequence
+
+import numpy as np
 
 import ambrosial.swan.typealiases as alias
+from ambrosial.swan.frame import STRFTIME, Bins, OrderFrame, compile_bins
+from ambrosial.swan.memo import carry_over, memoized
 from ambrosial.swiggy import Swiggy
 from ambrosial.swiggy.datamodel.order import Order
 from ambrosial.swiggy.datamodel.typealiases import OrderTypeHint
 
+AGGREGATES = (
+    "amount",
+    "count",
+    "charges",
+    "del_time",
+    "punctuality",
+    "distance",
+    "super_benefits",
+    "furthest_order",
+    "offer_discount",
+)
+
 
 class OrderAnalytics:
     def __init__(self, swiggy: Swiggy) -> None:
         self.swiggy = swiggy
         self.all_orders: list[Order] = self.swiggy.get_orders()
-        self.strftime_mapping = {
-            "minute": "%M",
-            "hour": "%H",
-            "day": "%d",
-            "week": "%w",
-            "week_": "%A",
-            "calweek": "%U",
-            "month": "%m",
-            "month_": "%B",
-            "year": "%Y",
-            "per_minute_": "%Y %B %d %H %M",
-            "per_minute": "%Y %m %d %H %M",
-            "per_hour_": "%Y %B %d %H",
-            "per_hour": "%Y %m %d %H",
-            "per_day_": "%Y %B %d",
-            "per_day": "%Y %m %d",
-        }
+        # rows of the frame line up with `all_orders`
+        self.frame = OrderFrame(self.swiggy.get_records())
+        self.strftime_mapping = dict(STRFTIME)
 
     def group(self) -> NoReturn:
         raise NotImplementedError("Each order is unique. Use Swiggy.get_orders()")
@@ -53,19 +54,64 @@ class OrderAnalytics:
                 group_dict[getattr(order, key)].append(order)
         return dict(group_dict)
 
-    def tseries_amount(self, bins: str = "year+month_") -> dict[str, int]:
-        crb = self._chronologically_binned(bins)
-        return {
-            " ".join(str(i) for i in key): sum(order.order_total for order in list(val))
-            for key, val in groupby(crb, lambda x: self._cmp(x.order_time, bins))
+    @memoized
+    def aggregate(
+        self,
+        bins: str = "year+month_",
+        metrics: Sequence[str] = ("amount", "count"),
+        unit: str = "minute",
+    ) -> dict[str, dict[str, Any]]:
+        """Compute `metrics` for every bin in one go, keyed by bin then metric.
+
+        The orders are binned once and every metric is computed off the same bins.
+        Metrics that don't apply to a bin, such as `del_time` for a bin of cancelled
+        orders, are left out of it. `unit` is the unit of the `del_time` metric.
+        """
+        return self._aggregate(bins, metrics, unit)
+
+    def apply_new_orders(self, orders: list[Order]) -> None:
+        """Fold `orders`, newer than every order analysed so far, into the analytics.
+
+        Cached aggregates have only the bins that `orders` fall in computed again.
+        """
+        # `orders` are the first ones of `swiggy`, their records are converted already
+        records = self.swiggy.get_records()[: len(orders)]
+        self.all_orders[:0] = orders
+        self.frame = self.frame.prepend(records)
+        carry_over(self, aggregate=partial(self._updated, count=len(orders)))
+
+    def _aggregate(
+        self, bins: str, metrics: Sequence[str], unit: str
+    ) -> dict[str, dict[str, Any]]:
+        if any((x := metric) not in AGGREGATES for metric in metrics):
+            raise KeyError(
+                f"Invalid metric: {repr(x)}. Available metrics: {repr(AGGREGATES)}"
+            )
+        bins_ = self._bins(bins)
+        per_metric = {
+            metric: (
+                self._agg_del_time(bins_, unit)
+                if metric == "del_time"
+                else getattr(self, f"_agg_{metric}")(bins_)
+            )
+            for metric in dict.fromkeys(metrics)
         }
+        aggregated: dict[str, dict[str, Any]] = {}
+        for label in bins_.labels:
+            values = {
+                metric: per_bin[label]
+                for metric, per_bin in per_metric.items()
+                if label in per_bin
+            }
+            if values:
+                aggregated[label] = values
+        return aggregated
+
+    def tseries_amount(self, bins: str = "year+month_") -> dict[str, int]:
+        return self._tseries(bins, "amount")
 
     def tseries_count(self, bins: str = "year+month_") -> dict[str, int]:
-        crb = self._chronologically_binned(bins)
-        return {
-            " ".join(str(i) for i in key): len(list(val))
-            for key, val in groupby(crb, lambda x: self._cmp(x.order_time, bins))
-        }
+        return self._tseries(bins, "count")
 
     def tseries_charges(
         self, bins: str = "year+month_"
@@ -74,37 +120,127 @@ class OrderAnalytics:
         Delivery charges are zero only when the order had free delivery (Swiggy Super)
         In that case check free_delivery_discount_hit attribute
         """
-        crb = self._chronologically_binned(bins)
-        return {
-            " ".join(str(i) for i in key): dict(
-                sum(
-                    [Counter(order.charges) for order in orders],
-                    Counter(),
-                )
-            )
-            for key, orders in groupby(crb, lambda x: self._cmp(x.order_time, bins))
-        }
+        return self._tseries(bins, "charges")
 
     def tseries_del_time(
         self,
         bins: str = "year+month_",
         unit: str = "minute",
     ) -> dict[str, alias.DelTime]:
+        return self._tseries(bins, "del_time", unit)
+
+    def tseries_punctuality(
+        self, bins: str = "year+month_"
+    ) -> dict[str, alias.Punctuality]:
+        """all orders of a bin were cancelled if:
+        on_time==0 && late==0 && max_time==0 && min_time==24*60"""
+        return self._tseries(bins, "punctuality")
+
+    def tseries_distance(self, bins: str = "year+month_") -> dict[str, alias.Distance]:
+        return self._tseries(bins, "distance")
+
+    def tseries_super_benefits(
+        self,
+        bins: str = "year+month_",
+    ) -> dict[str, alias.SuperBenefits]:
+        return self._tseries(bins, "super_benefits")
+
+    def tseries_furthest_order(
+        self,
+        bins: str = "week_",
+    ) -> dict[str, alias.FurthestOrder]:
+        return self._tseries(bins, "furthest_order")
+
+    def _updated(
+        self,
+        aggregated: dict[str, dict[str, Any]],
+        count: int,
+        bins: str,
+        metrics: Sequence[str],
+        unit: str,
+    ) -> dict[str, dict[str, Any]]:
+        # the first `count` rows of the frame are the new orders
+        bins_ = self._bins(bins)
+        touched = np.unique(bins_.index[:count])
+        rows = np.flatnonzero(np.isin(bins_.index, touched))
+        subset = copy(self)
+        # results of the subset are not the ones of `self`
+        for attr in ("_memo", "_memo_version"):
+            subset.__dict__.pop(attr, None)
+        subset.all_orders = [self.all_orders[row] for row in rows]
+        subset.frame = OrderFrame([self.frame.records[row] for row in rows])
+        fresh = subset._aggregate(bins, metrics, unit)
+        touched_labels = {bins_.labels[bin_] for bin_ in touched}
+        updated = {}
+        for label in bins_.labels:
+            values = fresh if label in touched_labels else aggregated
+            if label in values:
+                updated[label] = values[label]
+        return updated
+
+    def _tseries(self, bins: str, metric: str, unit: str = "minute") -> dict[str, Any]:
+        return {
+            label: values[metric]
+            for label, values in self.aggregate(bins, [metric], unit).items()
+        }
+
+    def _agg_amount(self, bins_: Bins) -> dict[str, int]:
+        amount = np.zeros(bins_.count, np.int64)
+        np.add.at(amount, bins_.index, self.frame.order_total)
+        return dict(zip(bins_.labels, amount.tolist()))
+
+    def _agg_count(self, bins_: Bins) -> dict[str, int]:
+        count = np.bincount(bins_.index, minlength=bins_.count)
+        return dict(zip(bins_.labels, count.tolist()))
+
+    def _agg_charges(self, bins_: Bins) -> dict[str, OrderTypeHint.CHARGES]:
+        frame = self.frame
+        if (frame.charges < 0).any():
+            # negative charges cancel out differently in a running sum of Counters
+            return {
+                label: dict(
+                    sum(
+                        [Counter(frame.records[row].charges) for row in rows],
+                        Counter(),
+                    )
+                )
+                for label, rows in zip(bins_.labels, bins_.rows())
+            }
+        # `Counter` addition drops charges that don't add up to a positive amount
+        # and keeps the rest in the order they are first charged in.
+        n_charges = len(frame.charge_names)
+        totals = np.zeros((bins_.count, n_charges))
+        first = np.full((bins_.count, n_charges), len(frame))
+        for col in range(n_charges):
+            totals[:, col] = np.bincount(
+                bins_.index, weights=frame.charges[:, col], minlength=bins_.count
+            )
+            charged = np.flatnonzero(frame.charges[:, col] > 0)
+            np.minimum.at(first[:, col], bins_.index[charged], charged)
+        tseries = {}
+        for bin_, label in enumerate(bins_.labels):
+            cols = sorted(
+                np.flatnonzero(totals[bin_] > 0), key=lambda c: (first[bin_, c], c)
+            )
+            tseries[label] = {
+                frame.charge_names[col]: totals[bin_, col].item() for col in cols
+            }
+        return tseries
+
+    def _agg_del_time(self, bins_: Bins, unit: str) -> dict[str, alias.DelTime]:
         conv = {"minute": 60, "hour": 3600}.get(unit, 1)
-        crb = self._chronologically_binned(bins)
+        frame = self.frame
+        deltime_all = frame.delivery_time / conv
         deltime_dict = {}
-        for key, orders in groupby(crb, lambda x: self._cmp(x.order_time, bins)):
-            orders_ = [order for order in orders if order.mCancellationTime == 0]
-            if len(orders_) == 0:
+        for label, rows in zip(bins_.labels, bins_.rows()):
+            rows = rows[~frame.cancelled[rows]]
+            if len(rows) == 0:
                 continue
-            deltime: list[float] = []
-            sla_time: list[int] = []
-            for order in orders_:
-                deltime.append(order.delivery_time_in_seconds / conv)
-                sla_time.append(order.sla_time)
-            max_time = max(orders_, key=lambda x: x.delivery_time_in_seconds)
-            min_time = min(orders_, key=lambda x: x.delivery_time_in_seconds)
-            deltime_dict[" ".join(str(i) for i in key)] = alias.DelTime(
+            deltime: list[float] = deltime_all[rows].tolist()
+            sla_time: list[int] = frame.sla_time[rows].tolist()
+            max_time = frame.records[rows[np.argmax(frame.delivery_time[rows])]]
+            min_time = frame.records[rows[np.argmin(frame.delivery_time[rows])]]
+            deltime_dict[label] = alias.DelTime(
                 deliveries=len(deltime),
                 mean_promised=round(st.mean(sla_time), 4),
                 mean_actual=round(st.mean(deltime), 4),
@@ -114,52 +250,97 @@ class OrderAnalytics:
                     promised=max_time.sla_time,
                     actual=round(max_time.delivery_time_in_seconds / conv, 4),
                     order_id=max_time.order_id,
-                    distance=max_time.restaurant.customer_distance[1],
+                    distance=max_time.distance,
                 ),
                 minimum=alias.DelTimeExtreme(
                     promised=min_time.sla_time,
                     actual=round(min_time.delivery_time_in_seconds / conv, 4),
                     order_id=min_time.order_id,
-                    distance=min_time.restaurant.customer_distance[1],
+                    distance=min_time.distance,
                 ),
             )
         return deltime_dict
 
-    def tseries_punctuality(
-        self, bins: str = "year+month_"
-    ) -> dict[str, alias.Punctuality]:
-        crb = self._chronologically_binned(bins)
+    def _agg_punctuality(self, bins_: Bins) -> dict[str, alias.Punctuality]:
+        frame = self.frame
+        delivered = ~frame.cancelled
+        index = bins_.index[delivered]
+        on_time = np.bincount(
+            index, weights=frame.on_time[delivered], minlength=bins_.count
+        )
+        late = np.bincount(index, minlength=bins_.count) - on_time
+        max_time = np.zeros(bins_.count, np.int64)
+        np.maximum.at(max_time, index, frame.actual_sla_time[delivered])
+        min_time = np.full(bins_.count, 24 * 60)  # one day
+        np.minimum.at(min_time, index, frame.actual_sla_time[delivered])
         return {
-            " ".join(str(i) for i in key): self._get_ordpunct_details(list(orders))
-            for key, orders in groupby(crb, lambda x: self._cmp(x.order_time, bins))
+            label: alias.Punctuality(
+                on_time=int(on_time[bin_]),
+                late=int(late[bin_]),
+                max_delivery_time=int(max_time[bin_]),
+                min_delivery_time=int(min_time[bin_]),
+            )
+            for bin_, label in enumerate(bins_.labels)
         }
 
-    def tseries_distance(self, bins: str = "year+month_") -> dict[str, alias.Distance]:
-        crb = self._chronologically_binned(bins)
-        distance_dict = {}
-        for key, orders in groupby(crb, lambda x: self._cmp(x.order_time, bins)):
-            orders_ = [order for order in orders if order.mCancellationTime == 0]
-            if len(orders_) == 0:
-                continue
-            distance = sum(order.restaurant.customer_distance[1] for order in orders_)
-            orders_placed = len(orders_)
-            distance_dict[" ".join(str(i) for i in key)] = alias.Distance(
-                distance_covered=round(distance, 4),
-                orders_placed=orders_placed,
-                distance_covered_per_order=round(distance / orders_placed, 4),
+    def _agg_distance(self, bins_: Bins) -> dict[str, alias.Distance]:
+        frame = self.frame
+        delivered = ~frame.cancelled
+        index = bins_.index[delivered]
+        # bincount adds up the distances in the order of the orders, like sum()
+        distance = np.bincount(
+            index, weights=frame.distance[delivered], minlength=bins_.count
+        )
+        orders_placed = np.bincount(index, minlength=bins_.count)
+        return {
+            label: alias.Distance(
+                distance_covered=round(distance[bin_].item(), 4),
+                orders_placed=int(orders_placed[bin_]),
+                distance_covered_per_order=round(
+                    distance[bin_].item() / int(orders_placed[bin_]), 4
+                ),
             )
-        return distance_dict
+            for bin_, label in enumerate(bins_.labels)
+            if orders_placed[bin_]
+        }
 
-    def tseries_super_benefits(
-        self,
-        bins: str = "year+month_",
-    ) -> dict[str, alias.SuperBenefits]:
-        crb = self._chronologically_binned(bins)
+    def _agg_super_benefits(self, bins_: Bins) -> dict[str, alias.SuperBenefits]:
         return {
-            " ".join(str(i) for i in key): self._get_super_benefits_detail(list(orders))
-            for key, orders in groupby(crb, lambda x: self._cmp(x.order_time, bins))
+            label: self._get_super_benefits_detail(
+                [self.all_orders[row] for row in rows]
+            )
+            for label, rows in zip(bins_.labels, bins_.rows())
         }
 
+    def _agg_offer_discount(self, bins_: Bins) -> dict[str, int]:
+        # discounts are truncated per order
+        discount = np.zeros(bins_.count, np.int64)
+        discounts = (
+            int(sum(offer.total_offer_discount for offer in order.offers_data))
+            for order in self.all_orders
+        )
+        np.add.at(
+            discount,
+            bins_.index,
+            np.fromiter(discounts, np.int64, len(self.all_orders)),
+        )
+        return dict(zip(bins_.labels, discount.tolist()))
+
+    def _agg_furthest_order(self, bins_: Bins) -> dict[str, alias.FurthestOrder]:
+        furthest_dict = {}
+        for label, rows in zip(bins_.labels, bins_.rows()):
+            furthest = self.all_orders[rows[np.argmax(self.frame.distance[rows])]]
+            f_rest = furthest.restaurant
+            furthest_dict[label] = alias.FurthestOrder(
+                distance_covered=furthest.restaurant.customer_distance[1],
+                restaurant=f"{f_rest.name}, {f_rest.area_name}, {f_rest.city_name}",
+                items=[item.name for item in furthest.items],
+                delivered_by=str(furthest.delivery_boy["name"]),
+                time_taken=f"{furthest.delivery_time_in_seconds/60:.2f} mins",
+                was_on_time=furthest.on_time,
+            )
+        return furthest_dict
+
     def _get_super_benefits_detail(
         self,
         orders: list[Order],
@@ -186,75 +367,8 @@ class OrderAnalytics:
             ),
         )
 
-    def tseries_furthest_order(
-        self,
-        bins: str = "week_",
-    ) -> dict[str, alias.FurthestOrder]:
-        crb = self._chronologically_binned(bins)
-        furthest_dict = {}
-        for key, orders in groupby(crb, lambda x: self._cmp(x.order_time, bins)):
-            furthest = max(orders, key=lambda x: x.restaurant.customer_distance[1])
-            f_rest = furthest.restaurant
-            furthest_dict[" ".join(str(i) for i in key)] = alias.FurthestOrder(
-                distance_covered=furthest.restaurant.customer_distance[1],
-                restaurant=f"{f_rest.name}, {f_rest.area_name}, {f_rest.city_name}",
-                items=[item.name for item in furthest.items],
-                delivered_by=str(furthest.delivery_boy["name"]),
-                time_taken=f"{furthest.delivery_time_in_seconds/60:.2f} mins",
-                was_on_time=furthest.on_time,
-            )
-        return furthest_dict
-
-    def _chronologically_binned(self, bins: str) -> list[Order]:
-        return sorted(
-            self.all_orders,
-            key=lambda x: self._cmp(x.order_time, bins, chrono=True),
-        )
-
-    def _get_ordpunct_details(self, orders: list[Order]) -> alias.Punctuality:
-        """all instances of `Order` in `orders` were cancelled if:
-        on_time==0 && late==0 && max_time==0 && min_time==24*60"""
-        on_time = 0
-        late = 0
-        max_time = 0
-        min_time = 24 * 60  # one day
-        for order in orders:
-            if order.mCancellationTime:
-                continue
-            if order.on_time:
-                on_time += 1
-            else:
-                late += 1
-            actual_time = order.actual_sla_time
-            max_time = max(max_time, actual_time)
-            min_time = min(min_time, actual_time)
-        return alias.Punctuality(
-            on_time=on_time,
-            late=late,
-            max_delivery_time=max_time,
-            min_delivery_time=min_time,
-        )
-
-    def _cmp(self, order_time: datetime, bins: str, chrono: bool = False) -> tuple:
-        if chrono:
-            # else keys will be sorted in alphabetical order instead of chronological
-            strf_mapping = copy(self.strftime_mapping)
-            strf_mapping["per_minute_"] = strf_mapping["per_minute"]
-            strf_mapping["per_hour_"] = strf_mapping["per_hour"]
-            strf_mapping["per_day_"] = strf_mapping["per_day"]
-            strf_mapping["week_"] = strf_mapping["week"]
-            strf_mapping["month_"] = strf_mapping["month"]
-        else:
-            strf_mapping = self.strftime_mapping
-        # cannot use set() as it doesnot preserve order
-        bin_ = list(dict.fromkeys(attr for attr in bins.split("+") if attr))
-        if any((x := attr) not in strf_mapping for attr in bin_):
-            raise KeyError(
-                f"Invalid grouping key: {repr(x)}. "
-                f"Available keys: {repr(list(strf_mapping))}"
-            )
-
-        return tuple(order_time.strftime(strf_mapping[attr]) for attr in bin_)
+    def _bins(self, bins: str) -> Bins:
+        return self.frame.bins(compile_bins(bins))
 
     def _packed_instances(self, key: str, attr: Optional[str]) -> dict[Any, Any]:
         group_dict = defaultdict(list)
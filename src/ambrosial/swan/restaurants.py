@@ -1,6 +1,9 @@
 from collections import Counter, defaultdict
+from functools import cached_property
 from typing import Any, Optional
 
+from ambrosial.swan.memo import carry_over, memoized
+from ambrosial.swan.search import SearchIndex, SearchMode
 from ambrosial.swan.typealiases import RestaurantSummary
 from ambrosial.swiggy import Swiggy
 from ambrosial.swiggy.datamodel.order import Order
@@ -10,14 +13,34 @@ from ambrosial.swiggy.datamodel.restaurant import Restaurant
 class RestaurantAnalytics:
     def __init__(self, swiggy: Swiggy) -> None:
         self.swiggy = swiggy
-        self.all_restaurants: list[Restaurant] = self.swiggy.get_restaurants()
-        self._cuisine: dict[Restaurant, set[str]] = defaultdict(set)
-        for restaurant in reversed(self.all_restaurants):
-            self._cuisine[restaurant] |= {i.lower() for i in restaurant.cuisine}
-            restaurant.cuisine = self._cuisine[restaurant]
+        self._cuisine: dict[int, set[str]] = defaultdict(set)
+        self.all_restaurants: list[Restaurant] = self._merged_cuisines(
+            self.swiggy.get_restaurants()
+        )
+
+    def apply_new_orders(self, orders: list[Order]) -> None:
+        """Fold the restaurants of `orders`, newer than every order analysed so far."""
+        self.all_restaurants[:0] = self._merged_cuisines(
+            [order.restaurant for order in orders]
+        )
+        # cuisines of restaurants seen before may have grown too
+        for index in ("_name_index", "_area_index", "_cuisine_index"):
+            self.__dict__.pop(index, None)
+        touched = {order.restaurant.rest_id for order in orders}
+        carry_over(
+            self,
+            summarise=lambda summary, restaurant_id: None
+            if restaurant_id in touched
+            else summary,
+        )
 
     def group(self) -> dict[Restaurant, int]:
-        return dict(Counter(self.all_restaurants).most_common())
+        return {
+            entity.model.copy(
+                update={"cuisine": self._cuisine[entity.model.rest_id]}
+            ): entity.count
+            for entity in self.swiggy.get_distinct_restaurants(ranked=True)
+        }
 
     def grouped_count(self, group_by: str) -> dict[str, int]:
         if group_by == "cuisine":
@@ -33,7 +56,7 @@ class RestaurantAnalytics:
     def associated_orders(self, restaurant_id: int) -> list[Order]:
         return [
             self.swiggy.get_order(order_id=order_id)
-            for order_id in self.swiggy.cache.resturants[str(restaurant_id)]
+            for order_id in self.swiggy.cache.resturants.get(str(restaurant_id), [])
         ]
 
     def grouped_instances(self, key: str, attr: Optional[str] = None) -> dict[Any, Any]:
@@ -45,6 +68,7 @@ class RestaurantAnalytics:
                 group_dict[getattr(rest, key)].append(rest)
         return dict(group_dict)
 
+    @memoized
     def summarise(self, restaurant_id: int) -> RestaurantSummary:
         instances = self.associated_orders(restaurant_id)
         count = len(instances)
@@ -94,12 +118,11 @@ class RestaurantAnalytics:
             image_url=image_url,
         )
 
+    @memoized
     def cuisines(self) -> dict[str, int]:
         return dict(
             Counter(
-                cuisine
-                for restaurant in set(self.all_restaurants)
-                for cuisine in restaurant.cuisine
+                cuisine for cuisines in self._cuisine.values() for cuisine in cuisines
             ).most_common()
         )
 
@@ -108,41 +131,55 @@ class RestaurantAnalytics:
         name: str,
         area: Optional[str] = None,
         exact: bool = True,
+        mode: Optional[SearchMode] = None,
     ) -> list[Restaurant]:
-        if exact:
-            return [
-                restaurant
-                for restaurant in self.all_restaurants
-                if name.lower() == restaurant.name.lower()
-                and bool(
-                    area.lower() == restaurant.area_name.lower()
-                    if area is not None
-                    else True
-                )
-            ]
+        """Restaurants named `name` (in `area`), or whose name starts with or
+        contains it as per `mode`.
 
+        Without `mode`, `exact` picks between "exact" and "substring" matches.
+        """
+        mode = mode or ("exact" if exact else "substring")
+        positions = self._name_index.search(name, mode)
+        if area is not None:
+            in_area = set(self._area_index.search(area, mode))
+            positions = [position for position in positions if position in in_area]
+        return [self.all_restaurants[position] for position in positions]
+
+    def search_cuisine(
+        self, cuisine: str, exact: bool = True, mode: Optional[SearchMode] = None
+    ) -> list[Restaurant]:
+        mode = mode or ("exact" if exact else "substring")
         return [
-            restaurant
-            for restaurant in self.all_restaurants
-            if name.lower() in restaurant.name.lower()
-            and bool(
-                area.lower() in restaurant.area_name.lower()
-                if area is not None
-                else True
-            )
+            self.all_restaurants[position]
+            for position in self._cuisine_index.search(cuisine, mode)
         ]
 
-    def search_cuisine(self, cuisine: str, exact: bool = True) -> list[Restaurant]:
-        return (
-            [
-                restaurant
-                for restaurant in self.all_restaurants
-                if cuisine.lower() in restaurant.cuisine
-            ]
-            if exact
-            else [
-                restaurant
-                for restaurant in self.all_restaurants
-                if any(cuisine.lower() in c for c in restaurant.cuisine)
-            ]
-        )
+    def suggest_restaurant(self, name: str, limit: int = 10) -> list[str]:
+        """Up to `limit` distinct (lowercased) restaurant names ranked by how closely
+        they match `name`, tolerating typos."""
+        return self._name_index.fuzzy(name, limit)
+
+    @cached_property
+    def _name_index(self) -> SearchIndex:
+        return SearchIndex([rest.name] for rest in self.all_restaurants)
+
+    @cached_property
+    def _area_index(self) -> SearchIndex:
+        return SearchIndex([rest.area_name] for rest in self.all_restaurants)
+
+    @cached_property
+    def _cuisine_index(self) -> SearchIndex:
+        return SearchIndex(rest.cuisine for rest in self.all_restaurants)
+
+    def _merged_cuisines(self, restaurants: list[Restaurant]) -> list[Restaurant]:
+        # The cuisines of all the orders of a restaurant are merged in place into
+        # one set shared by all its copies. Models are shared with `Swiggy`, so it
+        # goes on a copy.
+        for entity in self.swiggy.get_distinct_restaurants():
+            self._cuisine[entity.model.rest_id] |= {
+                i.lower() for i in entity.model.cuisine
+            }
+        return [
+            restaurant.copy(update={"cuisine": self._cuisine[restaurant.rest_id]})
+            for restaurant in restaurants
+        ]
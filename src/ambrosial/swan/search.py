@@ -0,0 +1,86 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from itertools import chain
+from typing import Iterable, Literal
+
+SearchMode = Literal["exact", "prefix", "substring"]
+SEARCH_MODES = ("exact", "prefix", "substring")
+
+
+def ngrams(text: str, n: int = 3) -> set[str]:
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+
+class SearchIndex:
+    """Inverted index from lowercased names to the positions they were given at.
+
+    Queries run against the distinct names: exact and prefix lookups through a
+    sorted list of them, substring and typo-tolerant lookups through their n-grams.
+    """
+
+    def __init__(self, names: Iterable[Iterable[str]], n: int = 3) -> None:
+        """`names` holds the names of each position, e.g. the cuisines of each
+        restaurant."""
+        self.n = n
+        self.positions: dict[str, list[int]] = defaultdict(list)
+        for position, names_ in enumerate(names):
+            for name in dict.fromkeys(name.lower() for name in names_):
+                self.positions[name].append(position)
+        self.names = sorted(self.positions)
+        self.grams: dict[str, set[str]] = defaultdict(set)
+        for name in self.names:
+            for gram in ngrams(name, n):
+                self.grams[gram].add(name)
+
+    def exact(self, query: str) -> list[str]:
+        return [query.lower()] if query.lower() in self.positions else []
+
+    def prefix(self, query: str) -> list[str]:
+        query = query.lower()
+        matches = []
+        for name in self.names[bisect_left(self.names, query) :]:
+            if not name.startswith(query):
+                break
+            matches.append(name)
+        return matches
+
+    def substring(self, query: str) -> list[str]:
+        query = query.lower()
+        if len(query) < self.n:
+            return [name for name in self.names if query in name]
+        # a name containing `query` has every n-gram of it
+        grams = [self.grams.get(gram, set()) for gram in ngrams(query, self.n)]
+        grams.sort(key=len)
+        candidates = grams[0].intersection(*grams[1:])
+        return sorted(name for name in candidates if query in name)
+
+    def fuzzy(self, query: str, limit: int = 10) -> list[str]:
+        """Names ranked by their similarity to `query`, prefix matches first."""
+        query = query.lower()
+        ranked = self.prefix(query)[:limit]
+        shared = Counter(
+            chain.from_iterable(
+                self.grams.get(gram, ()) for gram in ngrams(query, self.n)
+            )
+        )
+        # only the names sharing the most n-grams are compared in full
+        candidates = [
+            name for name, _ in shared.most_common(limit * 5) if name not in ranked
+        ]
+        candidates.sort(key=lambda name: -SequenceMatcher(None, query, name).ratio())
+        return (ranked + candidates)[:limit]
+
+    def search(self, query: str, mode: SearchMode = "exact") -> list[int]:
+        """Positions of the names matching `query` in `mode`, in ascending order."""
+        if mode not in SEARCH_MODES:
+            raise KeyError(
+                f"Invalid mode: {repr(mode)}. Available modes: {repr(SEARCH_MODES)}"
+            )
+        return self.lookup(getattr(self, mode)(query))
+
+    def lookup(self, names: Iterable[str]) -> list[int]:
+        """Positions of `names`, in ascending order."""
+        return sorted(
+            set(chain.from_iterable(self.positions.get(name, ()) for name in names))
+        )
@@ -1,28 +1,107 @@
-from typing import Optional
+from functools import cached_property
+from importlib import import_module
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Optional
 
 from ambrosial.swan import SwiggyAnalytics
-from ambrosial.swich.barplot import BarPlot
-from ambrosial.swich.calendarplot import CalendarPlot
-from ambrosial.swich.ghubmap import GitHubMap
-from ambrosial.swich.heatmap import HeatMap
-from ambrosial.swich.map import Map
-from ambrosial.swich.regression import RegressionPlot
-from ambrosial.swich.wordcloud import WordCloud
+
+if TYPE_CHECKING:
+    from ambrosial.swich.barplot import BarPlot
+    from ambrosial.swich.batch import ChartSpec
+    from ambrosial.swich.calendarplot import CalendarPlot
+    from ambrosial.swich.ghubmap import GitHubMap
+    from ambrosial.swich.heatmap import HeatMap
+    from ambrosial.swich.map import Map
+    from ambrosial.swich.regression import RegressionPlot
+    from ambrosial.swich.wordcloud import WordCloud
+
+# plotter -> module it is imported from once accessed, see `__getattr__()`
+_PLOTTER_MODULES = {
+    "BarPlot": "barplot",
+    "CalendarPlot": "calendarplot",
+    "GitHubMap": "ghubmap",
+    "HeatMap": "heatmap",
+    "Map": "map",
+    "RegressionPlot": "regression",
+    "WordCloud": "wordcloud",
+}
+
+
+def __getattr__(name: str) -> Any:
+    # `from ambrosial.swich import HeatMap` only imports the plotting libraries of
+    # the plotter it asks for
+    if name in _PLOTTER_MODULES:
+        return getattr(import_module(f"{__name__}.{_PLOTTER_MODULES[name]}"), name)
+    raise AttributeError(f"module {repr(__name__)} has no attribute {repr(name)}")
 
 
 class SwiggyChart:
     def __init__(self, swan: Optional[SwiggyAnalytics] = None) -> None:
-        self.swan = swan
-        if self.swan is None:
-            self.swan = SwiggyAnalytics()
-
-        self.ghubmap = GitHubMap(self.swan)
-        self.calplot = CalendarPlot(self.swan)
-        self.wcloud = WordCloud(self.swan)
-        self.regplot = RegressionPlot(self.swan)
-        self.map = Map(self.swan)
-        self.barplot = BarPlot(self.swan)
-        self.heatmap = HeatMap(self.swan)
+        self.swan: SwiggyAnalytics = SwiggyAnalytics() if swan is None else swan
+
+    # Plotters are built when first used, along with their output directories.
+    # Their plotting libraries are imported at that point too.
+    @cached_property
+    def ghubmap(self) -> "GitHubMap":
+        from ambrosial.swich.ghubmap import GitHubMap
+
+        return GitHubMap(self.swan)
+
+    @cached_property
+    def calplot(self) -> "CalendarPlot":
+        from ambrosial.swich.calendarplot import CalendarPlot
+
+        return CalendarPlot(self.swan)
+
+    @cached_property
+    def wcloud(self) -> "WordCloud":
+        from ambrosial.swich.wordcloud import WordCloud
+
+        return WordCloud(self.swan)
+
+    @cached_property
+    def regplot(self) -> "RegressionPlot":
+        from ambrosial.swich.regression import RegressionPlot
+
+        return RegressionPlot(self.swan)
+
+    @cached_property
+    def map(self) -> "Map":
+        from ambrosial.swich.map import Map
+
+        return Map(self.swan)
+
+    @cached_property
+    def barplot(self) -> "BarPlot":
+        from ambrosial.swich.barplot import BarPlot
+
+        return BarPlot(self.swan)
+
+    @cached_property
+    def heatmap(self) -> "HeatMap":
+        from ambrosial.swich.heatmap import HeatMap
+
+        return HeatMap(self.swan)
+
+    def render_all(
+        self,
+        specs: Iterable["ChartSpec"],
+        workers: int = 1,
+        out_dir: Optional[Path] = None,
+    ) -> list[Optional[Path]]:
+        """Render many charts to files, in parallel with `workers` > 1.
+
+        Each spec names a chart as ``"plotter.method"``, with the keyword arguments
+        of the method as ``("plotter.method", {...})``. The analytics and the time
+        series the charts read are computed once, then charts are rendered by a pool
+        of processes, with the Agg backend. Each chart is written to its own file in
+        `out_dir`, by default in ``<home_path>/swich/render``.
+
+        Returns the file of each chart, or None if it had nothing to plot.
+        """
+        from ambrosial.swich.batch import render_all
+
+        return render_all(self, specs, workers=workers, out_dir=out_dir)
 
     def __repr__(self) -> str:
         return f"SwiggyChart({self.swan})"
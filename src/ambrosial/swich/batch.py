@@ -0,0 +1,168 @@
+from concurrent.futures import ProcessPoolExecutor
+from inspect import signature
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
+
+import matplotlib
+import matplotlib.pyplot as plt
+
+from ambrosial.swan import SwiggyAnalytics
+from ambrosial.swich import SwiggyChart
+from ambrosial.swich.heatmap import HeatMap
+from ambrosial.swiggy.utils import create_path
+
+# "plotter.method", optionally with the keyword arguments of the method
+ChartSpec = Union[str, tuple[str, dict[str, Any]]]
+
+PLOTTERS = ("barplot", "calplot", "ghubmap", "heatmap", "map", "regplot", "wcloud")
+# analytics built in the parent process, once for every worker
+ANALYTICS = ("orders", "offers", "items", "restaurants", "addresses", "payments")
+# `OrderAnalytics.aggregate()` (bins, metrics) read by each chart, through its
+# `tseries_*` methods. None stands for the `bins` argument of heatmaps.
+AGGREGATES: dict[str, list[tuple[Optional[str], tuple[str, ...]]]] = {
+    "heatmap.order_amount": [(None, ("amount",))],
+    "heatmap.order_count": [(None, ("count",))],
+    "heatmap.avg_delivery_time": [(None, ("del_time",))],
+    "heatmap.super_benefits": [(None, ("super_benefits",))],
+    "heatmap.total_saving": [(None, ("super_benefits", "offer_discount"))],
+    "calplot.cal_order_amount": [("per_day", ("amount",))],
+    "calplot.cal_order_count": [("per_day", ("count",))],
+    "calplot.month_order_amount": [("per_day", ("amount",))],
+    "calplot.month_order_count": [("per_day", ("count",))],
+    "ghubmap.order_amount": [("per_day", ("amount",))],
+    "ghubmap.order_count": [("per_day", ("count",))],
+    "ghubmap.super_benefits": [("per_day", ("super_benefits",))],
+    "ghubmap.total_saving": [("per_day", ("super_benefits",))],
+    "regplot.order_amount": [("per_minute_", ("amount",))],
+    "regplot.ordamt_ordfeeprcnt": [
+        ("per_minute_", ("amount",)),
+        ("per_minute_", ("charges",)),
+    ],
+    "regplot.ordamt_ordfee": [
+        ("per_minute_", ("amount",)),
+        ("per_minute_", ("charges",)),
+    ],
+}
+
+# chart of each worker process, see `_init_worker()`
+_chart: Optional[SwiggyChart] = None
+
+
+def render_all(
+    chart: SwiggyChart,
+    specs: Iterable[ChartSpec],
+    workers: int = 1,
+    out_dir: Optional[Path] = None,
+) -> list[Optional[Path]]:
+    """Render each chart of `specs` to its own file in `out_dir`, across `workers`
+    processes.
+
+    The orders, the analytics and the aggregates the charts read are computed once,
+    in this process, and sent to the workers. Charts are always rendered in worker
+    processes, with the Agg backend, so that the figures and the backend of this
+    process are left as they are.
+
+    Returns the file of each chart in the order of `specs`, or None for the charts
+    that had nothing to plot.
+    """
+    charts = [_parse(spec) for spec in specs]
+    out_dir = (
+        chart.swan.swiggy.home_path / "swich" / "render" if out_dir is None else out_dir
+    )
+    create_path(out_dir)
+    width = len(str(len(charts)))
+    jobs = [
+        (plotter, method, kwargs, out_dir / f"{i:0{width}}_{plotter}_{method}")
+        for i, (plotter, method, kwargs) in enumerate(charts)
+    ]
+    if not jobs:
+        return []
+    chart.swan.swiggy.get_orders()
+    for name in ANALYTICS:
+        getattr(chart.swan, name)
+    for plotter, method, kwargs, _ in jobs:
+        _aggregate(chart.swan, plotter, method, kwargs)
+    # spawned workers start without the figures and GUI backend of this process
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(workers, len(jobs))),
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(chart.swan,),
+    ) as executor:
+        return list(executor.map(_render_in_worker, jobs))
+
+
+def _parse(spec: ChartSpec) -> tuple[str, str, dict[str, Any]]:
+    name, kwargs = (spec, {}) if isinstance(spec, str) else spec
+    plotter, _, method = name.partition(".")
+    if plotter not in PLOTTERS or not method or method.startswith("_"):
+        raise KeyError(
+            f"Invalid chart: {repr(name)}. "
+            f"Charts are named 'plotter.method', available plotters: {repr(PLOTTERS)}"
+        )
+    return plotter, method, kwargs
+
+
+def _aggregate(
+    swan: SwiggyAnalytics, plotter: str, method: str, kwargs: dict[str, Any]
+) -> None:
+    # Memoized in `swan.orders`, the workers find them in the copy they are sent.
+    for bins, metrics in AGGREGATES.get(f"{plotter}.{method}", []):
+        if bins is None:
+            arguments = signature(getattr(HeatMap, method)).bind_partial(**kwargs)
+            arguments.apply_defaults()
+            bins = arguments.arguments["bins"]
+        swan.orders.aggregate(bins, metrics)
+
+
+def _init_worker(swan: SwiggyAnalytics) -> None:
+    global _chart
+    matplotlib.use("Agg")
+    _chart = SwiggyChart(swan)
+
+
+def _render_in_worker(job: tuple[str, str, dict[str, Any], Path]) -> Optional[Path]:
+    assert _chart is not None
+    return _render(_chart, *job)
+
+
+def _render(
+    chart: SwiggyChart,
+    plotter: str,
+    method: str,
+    kwargs: dict[str, Any],
+    fp: Path,
+) -> Optional[Path]:
+    render = getattr(getattr(chart, plotter), method)
+    if plotter == "wcloud":
+        fp = fp.with_suffix(".png")
+        # a word cloud is only written when there are words, drop any earlier one
+        fp.unlink(missing_ok=True)
+        render(path=fp.parent, fname=fp.name, **kwargs)
+        return fp if fp.exists() else None
+    if plotter == "map":
+        base_map = render(save=False, **kwargs)
+        if base_map is None:
+            return None
+        fp = fp.with_suffix(".html")
+        base_map.save(fp)
+        return fp
+    # the other plotters draw on the current figure, a new one for each chart
+    existing = set(plt.get_fignums())
+    plt.figure()
+    try:
+        render(**kwargs)
+        drawn = [
+            num
+            for num in plt.get_fignums()
+            if num not in existing and plt.figure(num).get_axes()
+        ]
+        if not drawn:
+            return None
+        fp = fp.with_suffix(".png")
+        plt.figure(drawn[-1]).savefig(fp, bbox_inches="tight")
+        return fp
+    finally:
+        for num in set(plt.get_fignums()) - existing:
+            plt.close(num)
@@ -1,6 +1,6 @@
-import warnings
 from collections import Counter, defaultdict
-from typing import Literal
+from functools import lru_cache
+from typing import Callable, Literal
 
 import numpy as np
 import pandas as pd
@@ -42,23 +42,55 @@ STRF_MAPPING = {
 }
 
 
+# Integer code of each bin of an hourly `pd.DatetimeIndex`, see `_skeleton()`
+CODES: dict[str, Callable[[pd.DatetimeIndex], np.ndarray]] = {
+    "hour": lambda d: d.hour.values,
+    "day": lambda d: d.day.values,
+    "week": lambda d: d.dayofweek.values,
+    "week_": lambda d: d.dayofweek.values,
+    # "%U": weeks start on Sunday, `dayofweek` is 0 on Monday
+    "calweek": lambda d: (d.dayofyear.values + 5 - (d.dayofweek.values + 1) % 7) // 7,
+    "month": lambda d: d.month.values,
+    "month_": lambda d: d.month.values,
+    "year": lambda d: d.year.values,
+}
+
+
 def get_dataframe(data: dict[str, int], bin_: list[str]) -> pd.DataFrame:
+    """Pivot `data` on the two `bin_`. The bins of a year missing from `data`
+    are NaN."""
+    skeleton = _skeleton(tuple(bin_))
+    observed = pd.Series(
+        list(data.values()),
+        index=_bin_index(list(data), bin_),
+        dtype=None if data else np.float64,
+    )
+    missing = skeleton[~skeleton.isin(observed.index)]
+    return observed.reindex(observed.index.append(missing)).unstack()
+
+
+@lru_cache(maxsize=None)
+def _skeleton(bin_: tuple[str, ...]) -> pd.MultiIndex:
+    # The bins of every hour of 2000, a leap year. Only the first hour of each
+    # bin is formatted.
     drange = pd.date_range(start="2000-01-01", end="2000-12-31", freq="1H")
-    for date in drange:
-        data.setdefault(
-            date.strftime(" ".join(STRF_MAPPING[b] for b in bin_)),
-            np.NaN,
-        )
-    data_tuple = [(*key.split(" "), val) for key, val in data.items()]
-    df = pd.DataFrame(data_tuple, columns=[*bin_, "value"])
-    if "month_" in bin_:
-        df["month_"] = pd.Categorical(df["month_"], categories=MONTH, ordered=True)
-    if "week_" in bin_:
-        df["week_"] = pd.Categorical(df["week_"], categories=WEEKDAY, ordered=True)
-    df.sort_values(by=bin_, inplace=True)
-    with warnings.catch_warnings():
-        warnings.simplefilter(action="ignore", category=FutureWarning)
-        return df.pivot(*bin_, "value")
+    codes = np.stack([CODES[b](drange) for b in bin_], axis=1)
+    _, first = np.unique(codes, axis=0, return_index=True)
+    keys = drange[np.sort(first)].strftime(" ".join(STRF_MAPPING[b] for b in bin_))
+    return _bin_index(list(keys), list(bin_))
+
+
+def _bin_index(keys: list[str], bin_: list[str]) -> pd.MultiIndex:
+    labels = [key.split(" ") for key in keys]
+    levels = []
+    for i, b in enumerate(bin_):
+        level = [label[i] for label in labels]
+        if b in ("month_", "week_"):
+            categories = MONTH if b == "month_" else WEEKDAY
+            levels.append(pd.Categorical(level, categories=categories, ordered=True))
+        else:
+            levels.append(level)
+    return pd.MultiIndex.from_arrays(levels, names=bin_)
 
 
 def _offer_discount(swan: SwiggyAnalytics, bin_: list[str]) -> dict[str, int]:
@@ -77,9 +109,15 @@ def _super_benefits(swan: SwiggyAnalytics, bin_: list[str]) -> dict[str, int]:
 
 
 def _total_saving(swan: SwiggyAnalytics, bin_: list[str]) -> dict[str, int]:
-    return dict(
-        Counter(_super_benefits(swan, bin_)) + Counter(_offer_discount(swan, bin_))
+    aggregated = swan.orders.aggregate(
+        "+".join(bin_), ["super_benefits", "offer_discount"]
     )
+    super_benefits = {
+        key: int(val["super_benefits"]["total_benefit"])
+        for key, val in aggregated.items()
+    }
+    offer_discount = {key: val["offer_discount"] for key, val in aggregated.items()}
+    return dict(Counter(super_benefits) + Counter(offer_discount))
 
 
 def _rest_del_time(swan: SwiggyAnalytics, bin_: list[str]) -> dict[str, int]:
@@ -3,7 +3,7 @@ from typing import Callable, Literal
 import pandas as pd
 
 from ambrosial.swan import SwiggyAnalytics
-from ambrosial.swich.utils import remove_outliers
+from ambrosial.swich.utils import outlier_mask
 
 
 def _df_order_amount(swan: SwiggyAnalytics, **_: bool) -> pd.DataFrame:
@@ -24,9 +24,8 @@ def _df_ordamt_ordfeeprcnt(swan: SwiggyAnalytics, ro: bool) -> pd.DataFrame:
     amount = list(data_amt.values())
     total_charges = [sum(i.values()) for i in data_chrg.values()]
     charge_percnt = [chrg / amt * 100 for chrg, amt in zip(total_charges, amount)]
-    if ro:
-        remove_outliers(charge_percnt, amount)
-    return pd.DataFrame({"x": amount, "y": charge_percnt})
+    df = pd.DataFrame({"x": amount, "y": charge_percnt})
+    return df[outlier_mask(charge_percnt, amount)] if ro else df
 
 
 def _df_ordamt_ordfee(swan: SwiggyAnalytics, ro: bool) -> pd.DataFrame:
@@ -35,9 +34,8 @@ def _df_ordamt_ordfee(swan: SwiggyAnalytics, ro: bool) -> pd.DataFrame:
     total_amount = list(data_amt.values())
     total_fee = [sum(i.values()) for i in data_fee.values()]
     fee_prcnt = [fee / amt for fee, amt in zip(total_fee, total_amount)]
-    if ro:
-        remove_outliers(fee_prcnt, total_amount, total_fee)
-    return pd.DataFrame({"x": total_fee, "y": total_amount, "color": fee_prcnt})
+    df = pd.DataFrame({"x": total_fee, "y": total_amount, "color": fee_prcnt})
+    return df[outlier_mask(fee_prcnt, total_amount, total_fee)] if ro else df
 
 
 def _df_ordtime_orddist(swan: SwiggyAnalytics, ro: bool) -> pd.DataFrame:
@@ -47,9 +45,8 @@ def _df_ordtime_orddist(swan: SwiggyAnalytics, ro: bool) -> pd.DataFrame:
         if not order.mCancellationTime:
             distance.append(order.restaurant.customer_distance[1])
             time_taken.append(order.delivery_time_in_seconds / 60)
-    if ro:
-        remove_outliers(time_taken, distance)
-    return pd.DataFrame({"x": distance, "y": time_taken})
+    df = pd.DataFrame({"x": distance, "y": time_taken})
+    return df[outlier_mask(time_taken, distance)] if ro else df
 
 
 def _df_ordtime_punctuality_bool(swan: SwiggyAnalytics, ro: bool) -> pd.DataFrame:
@@ -60,9 +57,8 @@ def _df_ordtime_punctuality_bool(swan: SwiggyAnalytics, ro: bool) -> pd.DataFram
         if not order.mCancellationTime:
             delivery_time.append(order.delivery_time_in_seconds / 60)
             punctuality.append(order.on_time)
-    if ro:
-        remove_outliers(delivery_time, punctuality)
-    return pd.DataFrame({"x": delivery_time, "y": punctuality})
+    df = pd.DataFrame({"x": delivery_time, "y": punctuality})
+    return df[outlier_mask(delivery_time, punctuality)] if ro else df
 
 
 def _df_orddist_punctuality_bool(swan: SwiggyAnalytics, ro: bool) -> pd.DataFrame:
@@ -73,9 +69,8 @@ def _df_orddist_punctuality_bool(swan: SwiggyAnalytics, ro: bool) -> pd.DataFram
         if not order.mCancellationTime:
             delivery_dist.append(order.restaurant.customer_distance[1])
             punctuality.append(order.on_time)
-    if ro:
-        remove_outliers(delivery_dist, punctuality)
-    return pd.DataFrame({"x": delivery_dist, "y": punctuality})
+    df = pd.DataFrame({"x": delivery_dist, "y": punctuality})
+    return df[outlier_mask(delivery_dist, punctuality)] if ro else df
 
 
 def _df_ordtime_punctuality(swan: SwiggyAnalytics, ro: bool) -> pd.DataFrame:
@@ -88,9 +83,8 @@ def _df_ordtime_punctuality(swan: SwiggyAnalytics, ro: bool) -> pd.DataFrame:
             act_time.append(order.actual_sla_time)
             prom_time.append(order.sla_time)
             sla_diff.append(order.sla_difference)
-    if ro:
-        remove_outliers(sla_diff, act_time, prom_time)
-    return pd.DataFrame({"x": act_time, "y": prom_time, "color": sla_diff})
+    df = pd.DataFrame({"x": act_time, "y": prom_time, "color": sla_diff})
+    return df[outlier_mask(sla_diff, act_time, prom_time)] if ro else df
 
 
 def _df_ordamt_offramt(swan: SwiggyAnalytics, ro: bool) -> pd.DataFrame:
@@ -104,15 +98,14 @@ def _df_ordamt_offramt(swan: SwiggyAnalytics, ro: bool) -> pd.DataFrame:
             discount = sum(offer.total_offer_discount for offer in order.offers_data)
             offer_amount.append(discount)
             offer_percentage.append(discount / (discount + order.order_total))
-    if ro:
-        remove_outliers(order_amount, offer_amount, offer_percentage)
-    return pd.DataFrame(
+    df = pd.DataFrame(
         {
             "x": order_amount,
             "y": offer_amount,
             "color": offer_percentage,
         }
     )
+    return df[outlier_mask(order_amount, offer_amount, offer_percentage)] if ro else df
 
 
 def get_dataframe(
@@ -1,4 +1,3 @@
-from collections import Counter
 from statistics import NormalDist
 from typing import Any, Optional
 
@@ -39,26 +38,12 @@ class Map:
         hover_frmt: Optional[str] = None,
         popup_frmt: Optional[str] = None,
         save: bool = True,
-    ) -> folium.Map:
-        if city:
-            restaurants = [
-                restaurant
-                for restaurant in self.swan.swiggy.get_restaurants()
-                if restaurant.city_name.lower() == city.lower()
-            ]
-
-        else:
-            restaurants = self.swan.swiggy.get_restaurants()
-        # restaurants = (
-        #     self.swan.swiggy.get_restaurants()
-        #     if city is None and nationwide is True
-        #     else (
-        #         restaurant
-        #         for restaurant in self.swan.swiggy.get_restaurants()
-        #         if restaurant.city_name.lower() == city.lower()
-        #     )
-        # )
-        grouped = Counter(restaurants).most_common()
+    ) -> Optional[folium.Map]:
+        grouped = [
+            (entity.model, entity.count)
+            for entity in self.swan.swiggy.get_distinct_restaurants(ranked=True)
+            if not city or entity.model.city_name.lower() == city.lower()
+        ]
         return self._make_map(
             grouped=grouped,
             nationwide=nationwide,
@@ -74,7 +59,7 @@ class Map:
         hover_frmt: Optional[str] = None,
         popup_frmt: Optional[str] = None,
         save: bool = True,
-    ) -> folium.Map:
+    ) -> Optional[folium.Map]:
         all_instances = self.swan.orders.grouped_instances(key="restaurant")
         if city:
             filtered_instances = {
@@ -132,7 +117,9 @@ class Map:
         popup_frmt: Optional[str],
         hover_frmt: Optional[str],
         save: bool,
-    ) -> folium.Map:
+    ) -> Optional[folium.Map]:
+        if not grouped:
+            return None
         popup_frmt = self.popup_frmt if popup_frmt is None else popup_frmt
         hover_frmt = self.hover_frmt if hover_frmt is None else hover_frmt
 
@@ -1,8 +1,8 @@
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Literal, Optional, Sequence
 
+import numpy as np
 from matplotlib.ticker import Formatter, Locator
-from scipy import stats
 
 __all__ = [
     "WC_ICONS",
@@ -35,6 +35,11 @@ WC_PALETTES = (
     "lightbartlein.diverging.BlueDarkOrange12_12",
 )
 
+# default tolerance of each method of `outlier_mask()`: the z-score (or modified
+# z-score for "mad") at which a value is an outlier, or the number of IQRs
+# it must lie beyond the quartiles
+OUTLIER_TOLERANCE = {"zscore": 5.0, "iqr": 1.5, "mad": 3.5}
+
 
 class CustomFormatter(Formatter):
     def __init__(self, vmax: float, vmin: float) -> None:
@@ -69,21 +74,54 @@ def get_curr_time() -> str:
     return datetime.today().strftime("%Y%m%d_%H%M%S_")
 
 
-def _remove_outlier(
-    *args: list[Any],
-    target: list[Any],
-    tolerance: int,
-) -> None:
-    z = stats.zscore(target)
-    # Read more at: https://en.wikipedia.org/wiki/68%E2%80%9395%E2%80%9399.7_rule
-    # https://www.danielsoper.com/statcalc/calculator.aspx?id=53
-    outlier_indices = [ind for ind, zscore in enumerate(z) if abs(zscore) >= tolerance]
-    for index in reversed(outlier_indices):
-        target.pop(index)
-        for eachlist in args:
-            eachlist.pop(index)
-
-
-def remove_outliers(*args: list[Any]) -> None:
-    for i in range(len(args)):
-        _remove_outlier(*args[0:i], *args[i + 1 :], target=args[i], tolerance=5)
+def outlier_mask(
+    *columns: Sequence[Any],
+    method: Literal["zscore", "iqr", "mad"] = "zscore",
+    tolerance: Optional[float] = None,
+) -> np.ndarray:
+    """Mask of the rows of the parallel `columns` that are not an outlier in any
+    of them.
+
+    Columns are checked in turn, each only on the rows kept by the ones before.
+    See `OUTLIER_TOLERANCE` for what `tolerance` means for each `method`.
+    """
+    if method not in OUTLIER_TOLERANCE:
+        raise KeyError(
+            f"Invalid method: {repr(method)}. "
+            f"Available methods: {repr(list(OUTLIER_TOLERANCE))}"
+        )
+    tolerance = OUTLIER_TOLERANCE[method] if tolerance is None else tolerance
+    data = np.array(columns, dtype=np.float64, ndmin=2)
+    keep = np.ones(data.shape[1], dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for column in data:
+            keep[keep] = _inliers(column[keep], method, tolerance)
+    return keep
+
+
+def remove_outliers(
+    *columns: Sequence[Any],
+    method: Literal["zscore", "iqr", "mad"] = "zscore",
+    tolerance: Optional[float] = None,
+) -> list[np.ndarray]:
+    """The parallel `columns` without the rows `outlier_mask()` leaves out."""
+    keep = outlier_mask(*columns, method=method, tolerance=tolerance)
+    return [np.asarray(column)[keep] for column in columns]
+
+
+def _inliers(values: np.ndarray, method: str, tolerance: float) -> np.ndarray:
+    # comparisons with NaN are False, a constant column has no outlier
+    if values.size == 0:
+        return np.ones(0, dtype=bool)
+    if method == "zscore":
+        # Read more at: https://en.wikipedia.org/wiki/68%E2%80%9395%E2%80%9399.7_rule
+        # https://www.danielsoper.com/statcalc/calculator.aspx?id=53
+        return ~(np.abs(values - values.mean()) / values.std() >= tolerance)
+    if method == "iqr":
+        q1, q3 = np.percentile(values, [25, 75])
+        spread = tolerance * (q3 - q1)
+        return (values >= q1 - spread) & (values <= q3 + spread)
+    median = np.median(values)
+    mad = np.median(np.abs(values - median))
+    # 0.6745: the MAD of the standard normal, so that it compares to a z-score
+    return ~(0.6745 * np.abs(values - median) / mad >= tolerance)
@@ -103,9 +103,12 @@ class WordCloud:
         freq_weight: bool,
         kwargs: dict[str, Any],
     ) -> None:
-
+        if not data:
+            return
         if path is None:
             save_path = self.save_path / f"{get_curr_time()}{fname}"
+        else:
+            save_path = path / fname
         word_list = []
         for key, value in data.items():
             if freq_weight:
@@ -1,37 +1,112 @@
-from copy import deepcopy
+from contextlib import suppress
+from functools import cached_property, partial
+from http.cookiejar import CookieJar
 from pathlib import Path
-from typing import Any, ClassVar, Optional
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Iterator, Optional, Union
 from warnings import warn
 
-from requests import Response, get
-
+import ambrosial.swiggy.columnar as columnar
 import ambrosial.swiggy.convert as convert
 import ambrosial.swiggy.iohandler as ioh
+import ambrosial.swiggy.parallel as parallel
 import ambrosial.swiggy.utils as utils
 from ambrosial.swiggy.datamodel.address import Address
+from ambrosial.swiggy.datamodel.entity import Entity
 from ambrosial.swiggy.datamodel.item import Item
 from ambrosial.swiggy.datamodel.order import Offer, Order, Payment
+from ambrosial.swiggy.datamodel.record import OrderRecord
 from ambrosial.swiggy.datamodel.restaurant import Restaurant
 from ambrosial.swiggy.helper import Cache
+from ambrosial.swiggy.sqlstore import SQLiteStore
 from ambrosial.swiggy.utils import SwiggyOrderDict
 
+if TYPE_CHECKING:
+    from requests import Response
+
+    from ambrosial.swiggy.client import FetchClient
+
 
 class Swiggy:
     order_url: ClassVar[str] = "https://www.swiggy.com/dapi/order/all"
     profile_url: ClassVar[str] = "https://www.swiggy.com/mapi/profile/info"
-
-    def __init__(self, path: Optional[Path] = None, ddav: bool = False) -> None:
+    # model list -> attribute of `Order` it is gathered from, see `_models()`
+    model_attrs: ClassVar[dict[str, str]] = {
+        "items": "items",
+        "restaurants": "restaurant",
+        "addresses": "address",
+        "offers": "offers_data",
+        "payments": "payment_transaction",
+    }
+    # distinct model list -> posting lists of `cache` it is built from, see
+    # `_distinct()`
+    distinct_indexes: ClassVar[dict[str, str]] = {
+        "items": "items",
+        "restaurants": "resturants",
+        "addresses": "addresses",
+    }
+    cache: Union[Cache, SQLiteStore]
+    # set by the first request, `requests` is only imported to fetch orders
+    _response: "Response"
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ddav: bool = False,
+        rate_limit: Optional[float] = None,
+        max_retries: int = 5,
+        workers: int = 1,
+        offline: bool = False,
+    ) -> None:
         self.ddav = ddav
-        self.orders_raw: list[SwiggyOrderDict] = []
-        self.orders_refined: list[SwiggyOrderDict] = []
-        self._response: Response = Response()
+        self.offline = offline
+        self.workers = workers
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self._client: Optional["FetchClient"] = None
+        self._store: Optional[SQLiteStore] = None
+        self._orders_raw: Optional[list[SwiggyOrderDict]] = []
+        self._orders_refined: Optional[list[SwiggyOrderDict]] = []
         self._response_json: dict[str, Any] = {}
         self._fetched = False
+        self.trusted = False
+        self._version = 0
+        self._models_key: tuple[int, bool] = (-1, False)
+        self._models_cache: dict[str, list[Any]] = {}
+        self._distinct_key: tuple[int, bool] = (-1, False)
+        self._distinct_cache: dict[str, list[Entity[Any]]] = {}
         self.home_path = Path.home() / ".ambrosial" if path is None else path
         self._data_path = self.home_path / "data"
-        self._cookie_jar = utils.get_cookies("www.swiggy.com")
         utils.create_path(self._data_path)
 
+    @cached_property
+    def _cookie_jar(self) -> CookieJar:
+        # read from the browser only once a request is sent
+        return utils.get_cookies("www.swiggy.com")
+
+    @property
+    def orders_raw(self) -> list[SwiggyOrderDict]:
+        # orders are read from the SQLite store only when needed, see `loads()`
+        if self._orders_raw is None:
+            self._orders_raw = [] if self._store is None else self._store.load_raw()
+        return self._orders_raw
+
+    @orders_raw.setter
+    def orders_raw(self, orders: list[SwiggyOrderDict]) -> None:
+        self._orders_raw = orders
+
+    @property
+    def orders_refined(self) -> list[SwiggyOrderDict]:
+        if self._orders_refined is None:
+            self._orders_refined = (
+                [] if self._store is None else self._store.load_refined()
+            )
+        return self._orders_refined
+
+    @orders_refined.setter
+    def orders_refined(self, orders: list[SwiggyOrderDict]) -> None:
+        self._orders_refined = orders
+        self._version += 1
+
     @property
     def _is_exhausted(self) -> bool:
         utils.validate_response(self._response)
@@ -54,17 +129,31 @@ class Swiggy:
     #         user_registered=data["user_registered"],
     #     )
 
-    def fetch_orders(self) -> None:
-        self.orders_raw = []
-        self._send_req(order_id=None)
-        self.orders_raw.extend(self._parse_orders())
-        print("Retrieving orders...")
-        while self._is_exhausted is False:
-            self._send_req(order_id=self.orders_raw[-1]["order_id"])
-            self.orders_raw.extend(self._parse_orders())
-        print(f"Retrieved {len(self.orders_raw):>4} orders")
-        self.orders_refined = self._get_processed_order()
-        self._post_fetch()
+    def fetch_orders(self, incremental: bool = False, checkpoint: bool = False) -> None:
+        """Fetch order history from Swiggy.
+
+        With ``incremental=True`` the already known orders (in memory, or else
+        from the saved msgpack/json file) are kept and pagination stops at the
+        first page that has no new order.
+
+        With ``checkpoint=True`` every page is appended to a journal on disk as
+        soon as it is received. If the fetch is interrupted, the next call with
+        ``checkpoint=True`` resumes after the last journaled page. The two modes
+        can't be combined.
+        """
+        if self.offline:
+            raise ConnectionError("Swiggy(offline=True) cannot fetch orders.")
+        if incremental and checkpoint:
+            raise ValueError("fetch_orders() takes either incremental or checkpoint.")
+        try:
+            if incremental and (self._fetched or self._load_store()):
+                self._fetch_new_orders()
+            elif checkpoint:
+                self._fetch_checkpointed()
+            else:
+                self._fetch_all_orders()
+        finally:
+            self._close_client()
 
     # def fetchall(self) -> None:
     #     """Fetch both order details & account info.
@@ -75,10 +164,12 @@ class Swiggy:
     #     self.get_account_info()
 
     def get_order(self, order_id: int) -> Order:
-        return convert.order(self.cache.get_order(order_id=order_id), self.ddav)
+        return convert.order(
+            self.cache.get_order(order_id=order_id), self.ddav, self.trusted
+        )
 
     def get_orders(self) -> list[Order]:
-        return [convert.order(order, self.ddav) for order in self.orders_refined]
+        return self._models("orders")
 
     def get_item(self, item_id: int) -> Item:
         # convert.item() returns all the order items of the first order that contains
@@ -86,21 +177,35 @@ class Swiggy:
         # Thus, the comprehension is guaranteed to contain an Item with given item_id.
         return [
             item
-            for item in convert.item(self.cache.get_item(item_id=str(item_id)))
+            for item in convert.item(
+                self.cache.get_item(item_id=str(item_id)), self.trusted
+            )
             if item.item_id == item_id
         ][0]
 
     def get_items(self) -> list[Item]:
-        return [item for order in self.orders_refined for item in convert.item(order)]
+        return self._models("items")
+
+    def get_distinct_items(self, ranked: bool = False) -> list[Entity[Item]]:
+        """Each item once. See `_distinct()` for `ranked`."""
+        return self._distinct("items", ranked)
 
     def get_restaurant(self, restaurant_id: int) -> Restaurant:
         return convert.restaurant(
             self.cache.get_restaurant(restaurant_id=str(restaurant_id)),
             self.ddav,
+            self.trusted,
         )
 
     def get_restaurants(self) -> list[Restaurant]:
-        return [convert.restaurant(order, self.ddav) for order in self.orders_refined]
+        return self._models("restaurants")
+
+    def get_distinct_restaurants(
+        self, ranked: bool = False
+    ) -> list[Entity[Restaurant]]:
+        """Each restaurant once, with the cuisines of all its orders. See
+        `_distinct()` for `ranked`."""
+        return self._distinct("restaurants", ranked)
 
     def get_address(self, address_id: int, ver: Optional[int] = None) -> Address:
         if self.ddav is False and ver is not None:
@@ -113,30 +218,37 @@ class Swiggy:
                 address_id=str(address_id),
                 ver=int(ver),
             )
-        return convert.address(order, self.ddav)
+        return convert.address(order, self.ddav, self.trusted)
 
     def get_addresses(self) -> list[Address]:
-        return [convert.address(order, self.ddav) for order in self.orders_refined]
+        return self._models("addresses")
+
+    def get_distinct_addresses(self, ranked: bool = False) -> list[Entity[Address]]:
+        """Each address once, or each version of it if `ddav`. See `_distinct()`
+        for `ranked`."""
+        return self._distinct("addresses", ranked)
 
     def get_offer(self, order_id: int) -> list[Offer]:
-        return convert.offer(self.cache.get_offer(order_id=int(order_id)))
+        return convert.offer(self.cache.get_offer(order_id=int(order_id)), self.trusted)
 
     def get_offers(self) -> list[Offer]:
-        return [
-            offer for order in self.orders_refined for offer in convert.offer(order)
-        ]
+        return self._models("offers")
 
     def get_payment(self, transaction_id: int) -> list[Payment]:
         return convert.payment(
-            self.cache.get_payment(transaction_id=str(transaction_id))
+            self.cache.get_payment(transaction_id=str(transaction_id)),
+            self.trusted,
         )
 
     def get_payments(self) -> list[Payment]:
-        return [
-            payment
-            for order in self.orders_refined
-            for payment in convert.payment(order)
-        ]
+        return self._models("payments")
+
+    def get_record(self, order_id: int) -> OrderRecord:
+        return convert.record(self.cache.get_order(order_id=order_id))
+
+    def get_records(self) -> list[OrderRecord]:
+        """Compact `OrderRecord`s of all the orders, in the order of `get_orders()`."""
+        return self._models("records")
 
     def savej(self, fname: str = "orders.json") -> None:
         ioh.savej(self._data_path / fname, self.orders_raw)
@@ -144,48 +256,305 @@ class Swiggy:
     def saveb(self, fname: str = "orders.msgpack") -> None:
         ioh.saveb(self._data_path / fname, self.orders_raw)
 
-    def loadj(self, fname: str = "orders.json") -> None:
-        self.orders_raw = ioh.loadj(self._data_path / fname)
+    def loadj(self, fname: str = "orders.json", trusted: bool = False) -> None:
+        """Load the orders saved by `savej()`.
+
+        With `trusted`, the models returned by `get_*()` are built without
+        validation. Use it only for files written by ambrosial itself.
+        """
+        self._load_file(self._data_path / fname, ioh.loadj, trusted)
+
+    def loadb(self, fname: str = "orders.msgpack", trusted: bool = False) -> None:
+        """Load the orders saved by `saveb()`, see `loadj()` for `trusted`."""
+        self._load_file(self._data_path / fname, ioh.loadb, trusted)
+
+    def saves(self, fname: str = "orders.sqlite") -> None:
+        store = self._store_at(self._data_path / fname)
+        store.save(self.orders_raw, self.orders_refined)
+
+    def loads(self, fname: str = "orders.sqlite", trusted: bool = False) -> None:
+        """Attach the SQLite store at `fname` without reading the orders.
+
+        `get_order()`, `get_item()`, etc. are answered by indexed queries. The full
+        order lists are read from the store on first access. See `loadj()` for
+        `trusted`.
+        """
+        fp = self._data_path / fname
+        if not fp.exists():
+            raise FileNotFoundError(f"No such file: {str(fp)!r}")
+        self._store = self._store_at(fp)
+        self.cache = self._store
+        self._orders_raw = self._orders_refined = None
+        self._version += 1
+        self._fetched = True
+        self.trusted = trusted
+
+    def export_tables(
+        self,
+        dirname: str = "tables",
+        fmt: columnar.FORMAT = "parquet",
+    ) -> dict[str, Path]:
+        """Write `orders_refined` as columnar tables, one file per table.
+
+        Requires `pyarrow`: ``pip install ambrosial[arrow]``.
+        """
+        return columnar.export_tables(
+            self.orders_refined, self._data_path / dirname, fmt=fmt
+        )
+
+    def load_tables(
+        self,
+        dirname: str = "tables",
+        tables: Optional[list[str]] = None,
+        columns: Optional[dict[str, list[str]]] = None,
+        fmt: columnar.FORMAT = "parquet",
+    ) -> dict[str, Any]:
+        """Memory-map the tables written by `export_tables()` as `pyarrow.Table`s."""
+        return columnar.load_tables(
+            self._data_path / dirname, tables=tables, columns=columns, fmt=fmt
+        )
+
+    def _store_at(self, fp: Path) -> SQLiteStore:
+        if self._store is not None and self._store.fp == fp:
+            return self._store
+        return SQLiteStore(fp)
+
+    def _send_req(self, order_id: Optional[int] = None) -> None:
+        param = {} if order_id is None else {"order_id": order_id}
+        if self._client is None:
+            from ambrosial.swiggy.client import FetchClient
+
+            self._client = FetchClient(
+                self._cookie_jar,
+                max_retries=self.max_retries,
+                rate_limit=self.rate_limit,
+            )
+        self._response = self._client.get(Swiggy.order_url, params=param)
+        self._response_json = self._response.json()
+
+    def _close_client(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def _iter_pages(
+        self, order_id: Optional[int] = None
+    ) -> Iterator[list[SwiggyOrderDict]]:
+        self._send_req(order_id=order_id)
+        while self._is_exhausted is False:
+            page = self._parse_orders()
+            yield page
+            self._send_req(order_id=page[-1]["order_id"])
+
+    def _fetch_all_orders(self) -> None:
+        self.orders_raw = []
+        print("Retrieving orders...")
+        for page in self._iter_pages():
+            self.orders_raw.extend(page)
+        print(f"Retrieved {len(self.orders_raw):>4} orders")
         self.orders_refined = self._get_processed_order()
         self._post_fetch()
 
-    def loadb(self, fname: str = "orders.msgpack") -> None:
-        self.orders_raw = ioh.loadb(self._data_path / fname)
+    def _fetch_new_orders(self) -> None:
+        known_ids = set(self.cache.orders)
+        orders_new: list[SwiggyOrderDict] = []
+        print("Retrieving new orders...")
+        for page in self._iter_pages():
+            fresh = [order for order in page if order["order_id"] not in known_ids]
+            if not fresh:
+                break
+            orders_new.extend(fresh)
+        print(f"Retrieved {len(orders_new):>4} new orders")
+        refined_new = self._get_processed_order(orders_new)
+        # in-place, as `self.cache` holds a reference to `self.orders_refined`
+        self.orders_raw[:0] = orders_new
+        self.orders_refined[:0] = refined_new
+        models_built = self._models_key == (self._version, self.trusted)
+        self._version += 1
+        # the new orders haven't been validated yet
+        self.trusted = False
+        if models_built:
+            self._prepend_models(refined_new)
+        if isinstance(self.cache, Cache):
+            self.cache.update(refined_new)
+        else:
+            self.cache.save(orders_new, refined_new)
+
+    def _fetch_checkpointed(self) -> None:
+        journal = self._data_path / "orders.journal"
+        if (cursor := ioh.recover_journal(journal)) is not None:
+            print(f"Resuming after order_id {cursor}...")
+        else:
+            print("Retrieving orders...")
+        for page in self._iter_pages(order_id=cursor):
+            ioh.append_page(journal, cursor, page)
+            cursor = page[-1]["order_id"]
+        self.orders_raw = ioh.load_journal(journal)
+        journal.unlink(missing_ok=True)
+        print(f"Retrieved {len(self.orders_raw):>4} orders")
         self.orders_refined = self._get_processed_order()
         self._post_fetch()
 
-    def _send_req(self, order_id: Optional[int] = None) -> None:
-        param = {} if order_id is None else {"order_id": order_id}
-        cookie_str = "; ".join([f"{c.name}={c.value}" for c in self._cookie_jar])
-
-        headers_list = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/115.0",
-            "Accept": "*/*",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Referer": "https://www.swiggy.com/my-account",
-            "Content-Type": "application/json",
-            "__fetch_req__": "true",
-            "Connection": "keep-alive",
-            "Cookie": cookie_str,
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "same-origin",
+    def _load_store(self) -> bool:
+        for fname, load in (
+            ("orders.msgpack", self.loadb),
+            ("orders.json", self.loadj),
+        ):
+            if (self._data_path / fname).exists():
+                load(fname)
+                return True
+        return False
+
+    def _load_file(
+        self,
+        fp: Path,
+        load: Callable[[Path], list[SwiggyOrderDict]],
+        trusted: bool,
+    ) -> None:
+        # The refined orders are cached next to `fp`, so that they are
+        # only computed again once `fp` is modified. The cache is best-effort:
+        # where it can't be written (e.g. a read-only data directory) the orders
+        # are refined on every load.
+        self.orders_raw = load(fp)
+        orders_refined = ioh.load_refined(fp)
+        if orders_refined is None or len(orders_refined) != len(self.orders_raw):
+            orders_refined = self._get_processed_order()
+            with suppress(OSError):
+                ioh.save_refined(fp, orders_refined)
+        self.orders_refined = orders_refined
+        self._post_fetch(trusted)
+
+    def _models(self, kind: str) -> list[Any]:
+        """All the models of `kind`, converted once per version of `orders_refined`.
+
+        The models are immutable and shared by every caller, only the list is new.
+        """
+        if self._models_key != (self._version, self.trusted):
+            self._models_cache = {}
+            self._models_key = (self._version, self.trusted)
+        cache = self._models_cache
+        if kind not in cache:
+            cache[kind] = self._convert(kind, self.orders_refined, cache.get("orders"))
+        return list(cache[kind])
+
+    def _distinct(self, kind: str, ranked: bool = False) -> list[Entity[Any]]:
+        """The distinct models of `kind`, built once per version of `orders_refined`.
+
+        They come in the order they first appear in, or most frequent first if
+        `ranked` (ties in the order they first appear in, as `Counter.most_common()`).
+        """
+        if self._distinct_key != (self._version, self.trusted):
+            self._distinct_cache = {}
+            self._distinct_key = (self._version, self.trusted)
+        if kind not in self._distinct_cache:
+            self._distinct_cache[kind] = self._build_distinct(kind)
+        entities = list(self._distinct_cache[kind])
+        if ranked:
+            entities.sort(key=lambda entity: entity.count, reverse=True)
+        return entities
+
+    def _build_distinct(self, kind: str) -> list[Entity[Any]]:
+        # Entities come from the posting lists of `cache`, only the newest order of
+        # each is converted. They are sorted in the order they first appear in.
+        # They are not made while `cache` is built: that happens on every load and
+        # fetch (or in SQLite for `loads()`), and would convert models nobody asked
+        # for. The pass over the orders, keying each entity, is the one of `cache`.
+        index = Swiggy.distinct_indexes[kind]
+        if kind == "addresses" and self.ddav:
+            index = "addresses_ver"
+        seq = {order["order_id"]: i for i, order in enumerate(self.orders_refined)}
+        convert_ = self._converter(kind)
+        ranked = []
+        for key, order_ids in getattr(self.cache, index).items():
+            order = self.cache.get_order(order_ids[0])
+            model = convert_(order)
+            line = 0
+            if kind == "items":
+                line = [str(i.item_id) for i in model].index(str(key))
+                model = model[line]
+            if kind == "restaurants":
+                cuisine = set().union(
+                    *(
+                        self.cache.get_order(order_id)["restaurant_cuisine"]
+                        for order_id in order_ids
+                    )
+                )
+                model = model.copy(update={"cuisine": cuisine})
+            entity = Entity(model, len(order_ids), list(dict.fromkeys(order_ids)))
+            ranked.append(((seq[order_ids[0]], line), entity))
+        ranked.sort(key=lambda rank_entity: rank_entity[0])
+        return [entity for _, entity in ranked]
+
+    def _prepend_models(self, orders_refined: list[SwiggyOrderDict]) -> None:
+        """Convert only `orders_refined` into the models of the previous version."""
+        cache = self._models_cache
+        orders = self._convert("orders", orders_refined) if "orders" in cache else None
+        for kind in cache:
+            cache[kind][:0] = (
+                orders
+                if kind == "orders" and orders is not None
+                else self._convert(kind, orders_refined, orders)
+            )
+        self._models_key = (self._version, self.trusted)
+
+    def _convert(
+        self,
+        kind: str,
+        orders_refined: list[SwiggyOrderDict],
+        orders: Optional[list[Order]] = None,
+    ) -> list[Any]:
+        # Models that are part of an `Order` are taken from `orders` if converted
+        # already. Otherwise only the models of `kind` are converted.
+        if orders is not None and kind in Swiggy.model_attrs:
+            converted = [getattr(order, Swiggy.model_attrs[kind]) for order in orders]
+        else:
+            converted = parallel.map_sharded(
+                self._converter(kind), orders_refined, workers=self.workers
+            )
+        if kind in ("orders", "records"):
+            return converted
+        models: list[Any] = []
+        for model in converted:
+            models.extend(model if isinstance(model, list) else [model])
+        return models
+
+    def _converter(self, kind: str) -> Callable[[SwiggyOrderDict], Any]:
+        converters: dict[str, Callable[[SwiggyOrderDict], Any]] = {
+            "orders": partial(convert.order, ddav=self.ddav, trusted=self.trusted),
+            "items": partial(convert.item, trusted=self.trusted),
+            "restaurants": partial(
+                convert.restaurant, ddav=self.ddav, trusted=self.trusted
+            ),
+            "addresses": partial(convert.address, ddav=self.ddav, trusted=self.trusted),
+            "offers": partial(convert.offer, trusted=self.trusted),
+            "payments": partial(convert.payment, trusted=self.trusted),
+            "records": convert.record,
         }
+        return converters[kind]
 
-        self._response = get(Swiggy.order_url, headers=headers_list, params=param)
-        self._response_json = self._response.json()
-
-    def _get_processed_order(self) -> list[SwiggyOrderDict]:
-        return [utils.process_orders(deepcopy(order)) for order in self.orders_raw]
+    def _get_processed_order(
+        self, orders: Optional[list[SwiggyOrderDict]] = None
+    ) -> list[SwiggyOrderDict]:
+        orders = self.orders_raw if orders is None else orders
+        return parallel.map_sharded(utils.process_orders, orders, workers=self.workers)
 
     def _parse_orders(self) -> list[SwiggyOrderDict]:
         utils.validate_response(self._response)
         return self._response.json()["data"]["orders"]
 
-    def _post_fetch(self) -> None:
+    def _post_fetch(self, trusted: bool = False) -> None:
         self._fetched = True
-        self.cache: Cache = Cache(self.orders_refined)
+        self.trusted = trusted
+        self._store = None
+        self.cache = Cache(self.orders_refined)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The fetch session and the browser cookies are set up again when needed.
+        state = self.__dict__.copy()
+        for attr in ("_response", "_cookie_jar"):
+            state.pop(attr, None)
+        state["_client"] = None
+        return state
 
     def __repr__(self) -> str:
         return f"Swiggy(ddav = {self.ddav})"
@@ -0,0 +1,98 @@
+from http.cookiejar import CookieJar
+from random import uniform
+from threading import Lock
+from time import monotonic, sleep
+from typing import Any, ClassVar, Optional
+
+from requests import RequestException, Response, Session
+from requests.adapters import HTTPAdapter
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/115.0",
+    "Accept": "*/*",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Referer": "https://www.swiggy.com/my-account",
+    "Content-Type": "application/json",
+    "__fetch_req__": "true",
+    "Connection": "keep-alive",
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-origin",
+}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int = 1) -> None:
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"invalid token bucket: {rate=}, {capacity=}")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = monotonic()
+        self._lock = Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            self._tokens -= 1
+        if wait > 0:
+            sleep(wait)
+
+
+class FetchClient:
+    retry_status: ClassVar[frozenset[int]] = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        cookie_jar: CookieJar,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        rate_limit: Optional[float] = None,
+        burst: int = 1,
+        timeout: float = 30.0,
+    ) -> None:
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.bucket = None if rate_limit is None else TokenBucket(rate_limit, burst)
+        self.session = Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        # Cookies are sent as a raw header, irrespective of their domain & path.
+        cookie_str = "; ".join([f"{c.name}={c.value}" for c in cookie_jar])
+        self.session.headers.update({**HEADERS, "Cookie": cookie_str})
+
+    def get(self, url: str, params: Optional[dict[str, Any]] = None) -> Response:
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            response: Optional[Response] = None
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except RequestException:
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                retry = response.status_code in self.retry_status
+                if not retry or attempt >= self.max_retries:
+                    return response
+            sleep(self._delay(attempt, response))
+            attempt += 1
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _delay(self, attempt: int, response: Optional[Response] = None) -> float:
+        retry_after = None if response is None else response.headers.get("Retry-After")
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        # "full jitter": https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+        return uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
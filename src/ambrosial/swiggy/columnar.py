@@ -0,0 +1,260 @@
+"""Flatten refined orders into columnar tables stored as Parquet or Arrow IPC files.
+
+`pyarrow` is an optional dependency: ``pip install ambrosial[arrow]``.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Literal, Optional, get_args
+
+from ambrosial.swiggy.datamodel.typealiases import OrderTypeHint
+from ambrosial.swiggy.utils import SwiggyOrderDict
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+FORMAT = Literal["parquet", "arrow"]
+Columns = dict[str, list[Any]]
+Spec = dict[str, tuple[str, Callable[[Any], Any]]]
+
+TABLES = ("orders", "order_items", "payments", "offers", "addresses", "restaurants")
+CHARGES = {
+    charge: "charges_" + charge.lower().replace(" ", "_")
+    for charge in get_args(get_args(OrderTypeHint.CHARGES)[0])
+}
+
+
+def _amount(field: str, key: str) -> Callable[[dict[str, Any]], float]:
+    return lambda record: float(record[field].get(key, 0.0))
+
+
+# column name -> (type name, getter), in the order the columns are written
+ORDER_COLUMNS: Spec = {
+    "order_id": ("int64", lambda o: int(o["order_id"])),
+    "order_time": ("timestamp", lambda o: datetime.fromisoformat(o["order_time"])),
+    "order_status": ("string", lambda o: o["order_status"]),
+    "restaurant_id": ("int64", lambda o: int(o["restaurant_id"])),
+    "address_id": ("string", lambda o: str(o["delivery_address"]["id"])),
+    "address_version": ("int64", lambda o: int(o["delivery_address"]["version"])),
+    "order_total": ("int64", lambda o: int(o["order_total"])),
+    "order_total_with_tip": ("float64", lambda o: float(o["order_total_with_tip"])),
+    "item_total": ("float64", lambda o: float(o["item_total"])),
+    "coupon_applied": ("string", lambda o: o["coupon_applied"]),
+    "payment_method": ("string", lambda o: o["payment_method"]),
+    "sla_time": ("int64", lambda o: int(o["sla_time"])),
+    "actual_sla_time": ("int64", lambda o: int(o["actual_sla_time"])),
+    "sla_difference": ("int64", lambda o: int(o["sla_difference"])),
+    "delivery_time_in_seconds": (
+        "int64",
+        lambda o: int(o["delivery_time_in_seconds"]),
+    ),
+    "distance": ("float64", lambda o: float(o["restaurant_customer_distance"])),
+    "mCancellationTime": ("int64", lambda o: int(o["mCancellationTime"])),
+    "trade_discount": ("float64", lambda o: float(o["trade_discount"])),
+    "free_delivery_discount_hit": (
+        "int64",
+        lambda o: int(o["free_delivery_discount_hit"]),
+    ),
+    "is_super": (
+        "bool",
+        lambda o: any("super" in tag.lower() for tag in o["order_tags"]),
+    ),
+    **{
+        column: ("float64", _amount("charges", charge))
+        for charge, column in CHARGES.items()
+    },
+}
+ITEM_COLUMNS: Spec = {
+    "item_id": ("int64", lambda i: int(i["item_id"])),
+    "name": ("string", lambda i: i["name"]),
+    "is_veg": ("bool", lambda i: bool(i["is_veg"])),
+    "quantity": ("int64", lambda i: int(i["quantity"])),
+    "free_item_quantity": ("int64", lambda i: int(i["free_item_quantity"] or 0)),
+    "base_price": ("float64", lambda i: float(i["base_price"])),
+    "subtotal": ("float64", lambda i: float(i["subtotal"])),
+    "total": ("float64", lambda i: float(i["total"])),
+    "effective_item_price": ("float64", lambda i: float(i["effective_item_price"])),
+    "item_total_discount": ("float64", lambda i: float(i["item_total_discount"])),
+    "packing_charges": ("float64", lambda i: float(i["packing_charges"])),
+    "category": ("string", lambda i: i["category_details"]["category"]),
+    "sub_category": ("string", lambda i: i["category_details"]["sub_category"]),
+}
+PAYMENT_COLUMNS: Spec = {
+    "transactionId": ("string", lambda p: str(p["transactionId"])),
+    "paymentMethod": ("string", lambda p: p["paymentMethod"]),
+    "paymentMethodDisplayName": ("string", lambda p: p["paymentMethodDisplayName"]),
+    "transactionStatus": ("string", lambda p: p["transactionStatus"]),
+    "amount": ("float64", lambda p: float(p["amount"])),
+}
+OFFER_COLUMNS: Spec = {
+    "super_type": ("string", lambda f: f["super_type"]),
+    "discount_type": ("string", lambda f: f["discount_type"]),
+    "description": ("string", lambda f: f["description"]),
+    "total_offer_discount": ("float64", lambda f: float(f["total_offer_discount"])),
+    **{
+        share: ("float64", _amount("discount_share", share))
+        for share in ("alliance_discount", "store_discount", "swiggy_discount")
+    },
+}
+ADDRESS_COLUMNS: Spec = {
+    "address_id": ("string", lambda a: str(a["id"])),
+    "version": ("int64", lambda a: int(a["version"])),
+    "annotation": ("string", lambda a: a["annotation"]),
+    "area": ("string", lambda a: a["area"]),
+    "city": ("string", lambda a: a["city"]),
+    "lat": ("float64", lambda a: float(a["lat"])),
+    "lng": ("float64", lambda a: float(a["lng"])),
+}
+RESTAURANT_COLUMNS: Spec = {
+    "restaurant_id": ("int64", lambda o: int(o["restaurant_id"])),
+    "name": ("string", lambda o: o["restaurant_name"]),
+    "locality": ("string", lambda o: o["restaurant_locality"]),
+    "area_name": ("string", lambda o: o["restaurant_area_name"]),
+    "city_name": ("string", lambda o: o["restaurant_city_name"]),
+    "lat": ("float64", lambda o: float(o["restaurant_lat_lng"].split(",")[0])),
+    "lng": ("float64", lambda o: float(o["restaurant_lat_lng"].split(",")[1])),
+    "cuisine": ("list<string>", lambda o: list(o["restaurant_cuisine"])),
+}
+
+
+def flatten(orders_refined: list[SwiggyOrderDict]) -> dict[str, Columns]:
+    """One pass over `orders_refined`, returning the columns of every table.
+
+    Addresses and restaurants appear once each, as of their latest order.
+    """
+    tables: dict[str, Columns] = {
+        "orders": {column: [] for column in ORDER_COLUMNS},
+        "order_items": {"order_id": [], **{column: [] for column in ITEM_COLUMNS}},
+        "payments": {"order_id": [], **{column: [] for column in PAYMENT_COLUMNS}},
+        "offers": {
+            "order_id": [],
+            "coupon_applied": [],
+            **{column: [] for column in OFFER_COLUMNS},
+        },
+    }
+    addresses: dict[tuple[str, int], dict[str, Any]] = {}
+    restaurants: dict[str, SwiggyOrderDict] = {}
+    for order in orders_refined:
+        order_id = int(order["order_id"])
+        _append(tables["orders"], ORDER_COLUMNS, order)
+        for item in order["order_items"]:
+            tables["order_items"]["order_id"].append(order_id)
+            _append(tables["order_items"], ITEM_COLUMNS, item)
+        for payment in order["payment_transactions"] or []:
+            tables["payments"]["order_id"].append(order_id)
+            _append(tables["payments"], PAYMENT_COLUMNS, payment)
+        for offer in [] if order["offers_data"] == "" else order["offers_data"]:
+            tables["offers"]["order_id"].append(order_id)
+            tables["offers"]["coupon_applied"].append(order["coupon_applied"])
+            _append(tables["offers"], OFFER_COLUMNS, offer)
+        address = order["delivery_address"]
+        latest = (str(address["id"]), int(address["version"]))
+        addresses.setdefault(latest, address)
+        restaurants.setdefault(str(order["restaurant_id"]), order)
+    tables["addresses"] = {column: [] for column in ADDRESS_COLUMNS}
+    for address in addresses.values():
+        _append(tables["addresses"], ADDRESS_COLUMNS, address)
+    tables["restaurants"] = {column: [] for column in RESTAURANT_COLUMNS}
+    for order in restaurants.values():
+        _append(tables["restaurants"], RESTAURANT_COLUMNS, order)
+    return tables
+
+
+def export_tables(
+    orders_refined: list[SwiggyOrderDict],
+    directory: Path,
+    fmt: FORMAT = "parquet",
+) -> dict[str, Path]:
+    pa = _import_pyarrow()
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for name, columns in flatten(orders_refined).items():
+        schema = pa.schema(
+            [(column, _arrow_type(pa, type_)) for column, type_ in _types(name)]
+        )
+        table = pa.table(columns, schema=schema)
+        paths[name] = directory / f"{name}.{fmt}"
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            pq.write_table(table, paths[name])
+        else:
+            with pa.OSFile(str(paths[name]), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+    return paths
+
+
+def load_tables(
+    directory: Path,
+    tables: Optional[list[str]] = None,
+    columns: Optional[dict[str, list[str]]] = None,
+    fmt: FORMAT = "parquet",
+) -> dict[str, "pa.Table"]:
+    """Memory-map the tables exported by `export_tables()`.
+
+    Only `columns[table]` are read for the tables listed in `columns`.
+    """
+    pa = _import_pyarrow()
+    columns = {} if columns is None else columns
+    loaded = {}
+    for name in TABLES if tables is None else tables:
+        path = directory / f"{name}.{fmt}"
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            loaded[name] = pq.read_table(
+                path,
+                columns=columns.get(name),
+                memory_map=True,
+            )
+        else:
+            table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+            loaded[name] = table.select(columns[name]) if name in columns else table
+    return loaded
+
+
+def _append(table: Columns, spec: Spec, record: dict[str, Any]) -> None:
+    for column, (_, getter) in spec.items():
+        table[column].append(getter(record))
+
+
+def _types(name: str) -> list[tuple[str, str]]:
+    specs: dict[str, Spec] = {
+        "orders": ORDER_COLUMNS,
+        "order_items": ITEM_COLUMNS,
+        "payments": PAYMENT_COLUMNS,
+        "offers": OFFER_COLUMNS,
+        "addresses": ADDRESS_COLUMNS,
+        "restaurants": RESTAURANT_COLUMNS,
+    }
+    # line item tables lead with the id of the order they belong to
+    prefix = {
+        "order_items": [("order_id", "int64")],
+        "payments": [("order_id", "int64")],
+        "offers": [("order_id", "int64"), ("coupon_applied", "string")],
+    }
+    return prefix.get(name, []) + [
+        (column, type_) for column, (type_, _) in specs[name].items()
+    ]
+
+
+def _arrow_type(pa: Any, type_: str) -> "pa.DataType":
+    return {
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("s"),
+        "list<string>": pa.list_(pa.string()),
+    }[type_]
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as ex:
+        raise ImportError(
+            "Columnar export requires pyarrow: pip install ambrosial[arrow]"
+        ) from ex
+    return pa
@@ -1,9 +1,20 @@
+from functools import partial
+from sys import intern
+from typing import Any, Callable, TypeVar
+
+from pydantic import BaseModel
+from pydantic.datetime_parse import parse_datetime
+
 from ambrosial.swiggy.datamodel.address import Address
+from ambrosial.swiggy.datamodel.construct import construct
 from ambrosial.swiggy.datamodel.item import Item
 from ambrosial.swiggy.datamodel.order import Offer, Order, Payment
+from ambrosial.swiggy.datamodel.record import OrderRecord
 from ambrosial.swiggy.datamodel.restaurant import Restaurant
 from ambrosial.swiggy.utils import SwiggyOrderDict
 
+Model = TypeVar("Model", bound=BaseModel)
+
 URL = "https://res.cloudinary.com/swiggy/image/upload/"
 ATTRS = {
     "order": list(Order.__annotations__),
@@ -35,36 +46,35 @@ ATTRS["offers_data"].remove("coupon_applied")
 ATTRS["payment"].remove("order_id")
 
 
-def order(_order: SwiggyOrderDict, ddav: bool) -> Order:
-    return Order(
+def order(_order: SwiggyOrderDict, ddav: bool, trusted: bool = False) -> Order:
+    """Build the `Order` model of a refined order.
+
+    With `trusted`, the models are built without validation, see `construct()`.
+    """
+    return _model(Order, trusted)(
         **{attr: _order.get(attr, None) for attr in ATTRS["order"]},
-        restaurant=restaurant(_order, ddav),
-        payment_transaction=payment(_order),
-        items=item(_order),
-        offers_data=offer(_order),
-        address=address(_order, ddav),
+        restaurant=restaurant(_order, ddav, trusted),
+        payment_transaction=payment(_order, trusted),
+        items=item(_order, trusted),
+        offers_data=offer(_order, trusted),
+        address=address(_order, ddav, trusted),
         on_time=int(_order["sla_difference"]) >= 0,
     )
 
 
-def item(order: SwiggyOrderDict) -> list[Item]:
-    for item in order["order_items"]:
-        if not item["free_item_quantity"]:
-            item["free_item_quantity"] = 0
-        if item["image_id"] is None or not item["image_id"]:
-            item["image_id"] = "swiggy_pay/SwiggyLogo"
+def item(order: SwiggyOrderDict, trusted: bool = False) -> list[Item]:
     return [
-        Item(
+        _model(Item, trusted)(
             **{attr: item.get(attr, None) for attr in ATTRS["items"]},
             image=URL + item["image_id"],
             order_id=order["order_id"],
             restaurant_id=order["restaurant_id"],
         )
-        for item in order["order_items"]
+        for item in map(_item_defaults, order["order_items"])
     ]
 
 
-def restaurant(order: SwiggyOrderDict, ddav: bool) -> Restaurant:
+def restaurant(order: SwiggyOrderDict, ddav: bool, trusted: bool = False) -> Restaurant:
     address = order["delivery_address"]
     address_id = f'{address["id"]}_{address["version"]}' if ddav else address["id"]
     customer_distance = (address_id, order["restaurant_customer_distance"])
@@ -73,7 +83,7 @@ def restaurant(order: SwiggyOrderDict, ddav: bool) -> Restaurant:
         "lat": lat_lng[0],
         "lng": lat_lng[1],
     }
-    return Restaurant(
+    return _model(Restaurant, trusted)(
         **{
             attr.replace("restaurant_", ""): order.get(attr, None)
             for attr in ATTRS["restaurant"]
@@ -86,8 +96,8 @@ def restaurant(order: SwiggyOrderDict, ddav: bool) -> Restaurant:
     )
 
 
-def address(order: SwiggyOrderDict, ddav: bool) -> Address:
-    return Address(
+def address(order: SwiggyOrderDict, ddav: bool, trusted: bool = False) -> Address:
+    return _model(Address, trusted)(
         ddav=ddav,
         **{
             attr: order["delivery_address"].get(attr, None) for attr in ATTRS["address"]
@@ -96,11 +106,11 @@ def address(order: SwiggyOrderDict, ddav: bool) -> Address:
     )
 
 
-def payment(order: SwiggyOrderDict) -> list[Payment]:
+def payment(order: SwiggyOrderDict, trusted: bool = False) -> list[Payment]:
     if not order["payment_transactions"]:
         return []
     return [
-        Payment(
+        _model(Payment, trusted)(
             **{attr: pay.get(attr, None) for attr in ATTRS["payment"]},
             order_id=order["order_id"],
         )
@@ -108,14 +118,66 @@ def payment(order: SwiggyOrderDict) -> list[Payment]:
     ]
 
 
-def offer(order: SwiggyOrderDict) -> list[Offer]:
+def offer(order: SwiggyOrderDict, trusted: bool = False) -> list[Offer]:
     if order["offers_data"] == "":
         return []
     return [
-        Offer(
+        _model(Offer, trusted)(
             **{attr: offer.get(attr, None) for attr in ATTRS["offers_data"]},
             order_id=order["order_id"],
             coupon_applied=order["coupon_applied"],
         )
         for offer in order["offers_data"]
     ]
+
+
+def record(order: SwiggyOrderDict) -> OrderRecord:
+    address = order["delivery_address"]
+    return OrderRecord(
+        order_id=int(order["order_id"]),
+        order_time=parse_datetime(order["order_time"]),
+        order_status=intern(order["order_status"]),
+        order_total=int(order["order_total"]),
+        order_total_with_tip=float(order["order_total_with_tip"]),
+        item_total=float(order["item_total"]),
+        trade_discount=float(order["trade_discount"]),
+        delivery_time_in_seconds=int(order["delivery_time_in_seconds"]),
+        sla_time=int(order["sla_time"]),
+        actual_sla_time=int(order["actual_sla_time"]),
+        sla_difference=int(order["sla_difference"]),
+        on_time=int(order["sla_difference"]) >= 0,
+        distance=float(order["restaurant_customer_distance"]),
+        free_delivery_discount_hit=int(order["free_delivery_discount_hit"]),
+        cancellation_time=int(order["mCancellationTime"]),
+        charges={intern(name): float(v) for name, v in order["charges"].items()},
+        restaurant_id=int(order["restaurant_id"]),
+        restaurant_name=intern(order["restaurant_name"]),
+        restaurant_area=intern(order["restaurant_area_name"]),
+        restaurant_city=intern(order["restaurant_city_name"]),
+        address_id=intern(str(address["id"])),
+        address_version=int(address["version"]),
+        address_annotation=intern(address["annotation"]),
+        address_area=intern(address["area"]),
+        address_city=intern(address["city"]),
+        address_lat=float(address["lat"]),
+        address_lng=float(address["lng"]),
+        payment_method=intern(order["payment_method"]),
+        coupon_applied=intern(order["coupon_applied"]),
+    )
+
+
+def _model(model: type[Model], trusted: bool) -> Callable[..., Model]:
+    if trusted:
+        return partial(construct, model)
+    return model
+
+
+def _item_defaults(item: dict[str, Any]) -> dict[str, Any]:
+    # refined orders are shared, so the defaults are filled in on a copy
+    if item["free_item_quantity"] and item["image_id"]:
+        return item
+    return {
+        **item,
+        "free_item_quantity": item["free_item_quantity"] or 0,
+        "image_id": item["image_id"] or "swiggy_pay/SwiggyLogo",
+    }
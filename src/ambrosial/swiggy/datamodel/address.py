@@ -21,6 +21,9 @@ class Address(BaseModel):
     alternate_mobile: str
     flat_no: str
 
+    class Config:
+        allow_mutation = False
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Address):
             return NotImplemented
@@ -0,0 +1,114 @@
+"""Model construction without validation, for orders that were validated before.
+
+Field values are coerced the same way pydantic does (``"12"`` to ``12`` for an
+``int`` field, lists to sets, ...), but constraints are not checked and URLs are
+kept as plain strings.
+"""
+from datetime import datetime
+from functools import lru_cache, partial
+from typing import (
+    Any,
+    Callable,
+    Literal,
+    Optional,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from pydantic import AnyUrl, BaseModel
+from pydantic.datetime_parse import parse_datetime
+from pydantic.fields import ModelField
+from pydantic.validators import (
+    bool_validator,
+    float_validator,
+    int_validator,
+    str_validator,
+)
+
+Model = TypeVar("Model", bound=BaseModel)
+Coercer = Optional[Callable[[Any], Any]]  # `None` is the identity
+
+
+def construct(model: type[Model], **values: Any) -> Model:
+    """`model.construct(**values)`, with the values coerced to the field types."""
+    fields_values = {}
+    for name, field, coercer in _fields(model):
+        if name not in values:
+            fields_values[name] = field.get_default()
+        elif coercer is None or (value := values[name]) is None:
+            fields_values[name] = values[name]
+        else:
+            fields_values[name] = coercer(value)
+    instance = model.__new__(model)
+    # the same as `BaseModel.construct()` does, minus its per-field bookkeeping
+    object.__setattr__(instance, "__dict__", fields_values)
+    object.__setattr__(instance, "__fields_set__", set(values))
+    return instance
+
+
+@lru_cache(maxsize=None)
+def _fields(model: type[BaseModel]) -> tuple[tuple[str, ModelField, Coercer], ...]:
+    return tuple(
+        (name, field, _coercer(field.outer_type_))
+        for name, field in model.__fields__.items()
+    )
+
+
+def _coercer(type_: Any) -> Coercer:
+    origin, args = get_origin(type_), get_args(type_)
+    if origin is Literal or type_ is Any:
+        return None
+    if origin is Union:
+        return partial(_union, [_coercer(arg) for arg in args if arg is not type(None)])
+    if origin in (list, set):
+        return partial(_collection, origin, _coercer(args[0]))
+    if origin is tuple and args[-1] is Ellipsis:
+        return partial(_collection, tuple, _coercer(args[0]))
+    if origin is tuple:
+        return partial(_fixed_tuple, [_coercer(arg) for arg in args])
+    if origin is dict:
+        return partial(_dict, _coercer(args[1]))
+    if not isinstance(type_, type) or issubclass(type_, (BaseModel, AnyUrl)):
+        return None
+    bases: tuple[tuple[type, Callable[[Any], Any]], ...] = (
+        (bool, bool_validator),
+        (int, int_validator),
+        (float, float_validator),
+        (str, str_validator),
+        (datetime, parse_datetime),
+        (dict, dict),
+    )
+    for base, coercer in bases:
+        if issubclass(type_, base):
+            return coercer
+    return None
+
+
+def _coerce(coercer: Coercer, value: Any) -> Any:
+    return value if coercer is None or value is None else coercer(value)
+
+
+def _union(coercers: list[Coercer], value: Any) -> Any:
+    # like pydantic, the first member of the union that accepts `value` wins
+    for coercer in coercers:
+        try:
+            return _coerce(coercer, value)
+        except (TypeError, ValueError):
+            continue
+    return value
+
+
+def _collection(kind: type, coercer: Coercer, value: Any) -> Any:
+    return kind(value if coercer is None else map(coercer, value))
+
+
+def _fixed_tuple(coercers: list[Coercer], value: Any) -> tuple[Any, ...]:
+    return tuple(_coerce(coercer, v) for coercer, v in zip(coercers, value))
+
+
+def _dict(coercer: Coercer, value: Any) -> dict[Any, Any]:
+    if coercer is None:
+        return dict(value)
+    return {key: _coerce(coercer, v) for key, v in value.items()}
@@ -0,0 +1,34 @@
+from typing import Generic, TypeVar
+
+Model = TypeVar("Model")
+
+
+class Entity(Generic[Model]):
+    """A distinct restaurant, address or item, with the ids of the orders it is part
+    of (newest first) and the number of times it occurs in them.
+
+    Built by `Swiggy.get_distinct_items()`, `get_distinct_restaurants()` and
+    `get_distinct_addresses()`.
+    """
+
+    __slots__ = ("model", "count", "order_ids")
+
+    def __init__(self, model: Model, count: int, order_ids: list[int]) -> None:
+        self.model = model
+        self.count = count
+        self.order_ids = order_ids
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Entity):
+            return NotImplemented
+        return (self.model, self.count, self.order_ids) == (
+            other.model,
+            other.count,
+            other.order_ids,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Entity(model={self.model!r}, count={self.count}, "
+            f"order_ids={self.order_ids!r})"
+        )
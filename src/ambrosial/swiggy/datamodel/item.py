@@ -29,6 +29,9 @@ class Item(BaseModel):
     item_charges: ItemTypeHint.ITEM_CHARGES
     item_total_discount: NonNegativeFloat
 
+    class Config:
+        allow_mutation = False
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Item):
             return NotImplemented
@@ -18,6 +18,9 @@ class Offer(BaseModel):
     description: str
     discount_share: OfferTypeHint.DISCOUNT_SHARE
 
+    class Config:
+        allow_mutation = False
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Offer):
             return NotImplemented
@@ -42,6 +45,9 @@ class Payment(BaseModel):
     paymentGateway: Optional[str] = None
     pgResponseTime: str
 
+    class Config:
+        allow_mutation = False
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Payment):
             return NotImplemented
@@ -106,6 +112,9 @@ class Order(BaseModel):
     updated_at: str
     conservative_last_mile_distance: NonNegativeFloat
 
+    class Config:
+        allow_mutation = False
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Order):
             return NotImplemented
@@ -0,0 +1,100 @@
+from datetime import datetime
+from typing import Any
+
+
+class OrderRecord:
+    """Flat, read-only view of an order, holding only what the analytics need.
+
+    Unlike `Order`, a record has no per-instance `__dict__` nor nested models, and
+    its repeated strings (names, cities, areas, ...) are interned. Records are
+    built by `convert.record()`.
+    """
+
+    __slots__ = (
+        "order_id",
+        "order_time",
+        "order_status",
+        "order_total",
+        "order_total_with_tip",
+        "item_total",
+        "trade_discount",
+        "delivery_time_in_seconds",
+        "sla_time",
+        "actual_sla_time",
+        "sla_difference",
+        "on_time",
+        "distance",
+        "free_delivery_discount_hit",
+        "cancellation_time",
+        "charges",
+        "restaurant_id",
+        "restaurant_name",
+        "restaurant_area",
+        "restaurant_city",
+        "address_id",
+        "address_version",
+        "address_annotation",
+        "address_area",
+        "address_city",
+        "address_lat",
+        "address_lng",
+        "payment_method",
+        "coupon_applied",
+    )
+
+    order_id: int
+    order_time: datetime
+    order_status: str
+    order_total: int
+    order_total_with_tip: float
+    item_total: float
+    trade_discount: float
+    delivery_time_in_seconds: int
+    sla_time: int
+    actual_sla_time: int
+    sla_difference: int
+    on_time: bool
+    distance: float
+    free_delivery_discount_hit: int
+    cancellation_time: int
+    charges: dict[str, float]
+    restaurant_id: int
+    restaurant_name: str
+    restaurant_area: str
+    restaurant_city: str
+    address_id: str
+    address_version: int
+    address_annotation: str
+    address_area: str
+    address_city: str
+    address_lat: float
+    address_lng: float
+    payment_method: str
+    coupon_applied: str
+
+    def __init__(self, **fields: Any) -> None:
+        for name in OrderRecord.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name: str, value: Any) -> None:  # noqa: U100
+        raise TypeError(f'"{type(self).__name__}" is immutable')
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, OrderRecord):
+            return NotImplemented
+        return self.order_id == other.order_id
+
+    def __hash__(self) -> int:
+        return hash(self.order_id)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # `__setattr__` refuses the default unpickling of the slots
+        values = tuple(getattr(self, name) for name in OrderRecord.__slots__)
+        return (_unpickle, (values,))
+
+    def __repr__(self) -> str:
+        return f"OrderRecord(order_id={self.order_id}, order_time={self.order_time})"
+
+
+def _unpickle(values: tuple[Any, ...]) -> OrderRecord:
+    return OrderRecord(**dict(zip(OrderRecord.__slots__, values)))
@@ -20,6 +20,9 @@ class Restaurant(BaseModel):
     taxation_type: str
     gst_category: RestaurantTypeHint.GST_CATEGORY
 
+    class Config:
+        allow_mutation = False
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Restaurant):
             return NotImplemented
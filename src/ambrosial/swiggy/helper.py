@@ -1,12 +1,32 @@
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
+from datetime import datetime
 from typing import TypeAlias
 
 from ambrosial.swiggy.utils import SwiggyOrderDict
 
 OrderId: TypeAlias = int
 
+# posting lists of `Cache`, the keys of the last three are lowercased
+INDEXES = (
+    "items",
+    "resturants",
+    "addresses",
+    "addresses_ver",
+    "payment",
+    "payment_methods",
+    "coupons",
+    "statuses",
+    "cities",
+    "areas",
+    "cuisines",
+)
+
 
 class Cache:
+    """Orders by id, posting lists of the ids of the orders having some key (in
+    `orders_refined` order), and an index on order time."""
+
     def __init__(self, orders_refined: list[SwiggyOrderDict]) -> None:
         self.orders_refined = orders_refined
         self.orders: dict[OrderId, SwiggyOrderDict] = {}
@@ -15,6 +35,16 @@ class Cache:
         self.addresses: dict[str, list[OrderId]] = defaultdict(list)
         self.addresses_ver: dict[str, list[OrderId]] = defaultdict(list)
         self.payment: dict[str, list[OrderId]] = defaultdict(list)
+        self.payment_methods: dict[str, list[OrderId]] = defaultdict(list)
+        self.coupons: dict[str, list[OrderId]] = defaultdict(list)
+        self.statuses: dict[str, list[OrderId]] = defaultdict(list)
+        self.cities: dict[str, list[OrderId]] = defaultdict(list)
+        self.areas: dict[str, list[OrderId]] = defaultdict(list)
+        self.cuisines: dict[str, list[OrderId]] = defaultdict(list)
+        # (order time, rank among equal times) in ascending order, newest last,
+        # and the order id of each
+        self._times: list[tuple[datetime, int]] = []
+        self._time_ids: list[OrderId] = []
         self.cache()
 
     def cache(self) -> None:
@@ -32,6 +62,38 @@ class Cache:
             self.addresses_ver[address_w_ver].append(order_id)
             for transaction in order["payment_transactions"]:
                 self.payment[transaction["transactionId"]].append(order_id)
+            self.payment_methods[order["payment_method"]].append(order_id)
+            if order["coupon_applied"]:
+                self.coupons[order["coupon_applied"]].append(order_id)
+            self.statuses[order["order_status"]].append(order_id)
+            self.cities[order["restaurant_city_name"].lower()].append(order_id)
+            self.areas[order["restaurant_area_name"].lower()].append(order_id)
+            for cuisine in dict.fromkeys(
+                c.lower() for c in order["restaurant_cuisine"]
+            ):
+                self.cuisines[cuisine].append(order_id)
+        times = sorted(
+            (datetime.fromisoformat(order["order_time"]), -seq, order["order_id"])
+            for seq, order in enumerate(self.orders_refined)
+        )
+        self._times = [(time, seq) for time, seq, _ in times]
+        self._time_ids = [order_id for _, _, order_id in times]
+
+    def update(self, orders_new: list[SwiggyOrderDict]) -> None:
+        # `orders_new` are newer than every cached order, so their ids go in front
+        # of the existing posting lists to keep them in `orders_refined` order.
+        fresh = Cache(orders_new)
+        self.orders.update(fresh.orders)
+        for index_name in INDEXES:
+            index = getattr(self, index_name)
+            for key, order_ids in getattr(fresh, index_name).items():
+                index[key] = order_ids + index[key]
+        # on equal times the new orders go after (are newer than) the cached ones
+        offset = len(self._times) + len(orders_new)
+        for (time, seq), order_id in zip(fresh._times, fresh._time_ids):
+            position = bisect_right(self._times, (time, seq + offset))
+            self._times.insert(position, (time, seq + offset))
+            self._time_ids.insert(position, order_id)
 
     def get_order(self, order_id: int) -> SwiggyOrderDict:
         if (x := self.orders.get(order_id, None)) is not None:
@@ -75,3 +137,22 @@ class Cache:
         raise ValueError(
             f"payment_id {repr(transaction_id)}{type(transaction_id)} doesn't exist."
         )
+
+    def orders_between(self, start: datetime, end: datetime) -> list[SwiggyOrderDict]:
+        """Orders placed from `start` up to, but excluding, `end`, newest first."""
+        low = bisect_left(self._times, (start,))
+        high = bisect_left(self._times, (end,))
+        return [
+            self.orders[order_id] for order_id in reversed(self._time_ids[low:high])
+        ]
+
+    def orders_with(self, index: str, key: str) -> list[SwiggyOrderDict]:
+        """All the orders in the posting list of `key` in `index`, see `INDEXES`."""
+        if index not in INDEXES:
+            raise KeyError(
+                f"Invalid index: {repr(index)}. Available indexes: {repr(INDEXES)}"
+            )
+        if index in ("cities", "areas", "cuisines"):
+            key = key.lower()
+        order_ids = getattr(self, index).get(key, [])
+        return [self.orders[order_id] for order_id in dict.fromkeys(order_ids)]
@@ -1,25 +1,40 @@
-from json import JSONDecodeError, dump, load
+from json import dump, dumps, load
 from pathlib import Path
+from shutil import copyfileobj
+from textwrap import indent
+from typing import Any, Iterator, Optional, TypedDict
 
-from msgpack import pack, unpack
+from msgpack import Unpacker, pack
 
 from ambrosial.swiggy.utils import SwiggyOrderDict
 
 
+class JournalPage(TypedDict):
+    cursor: Optional[int]
+    orders: list[SwiggyOrderDict]
+
+
 def savej(fp: Path, orders: list[SwiggyOrderDict]) -> None:
-    curr_ids = {order["order_id"] for order in orders}
-    try:
-        with open(fp, "r", encoding="utf-8") as f:
-            loaded = load(f)
-            loaded_ids = {order["order_id"] for order in loaded}
-    except (JSONDecodeError, FileNotFoundError):
+    """Add the orders not yet in `fp` in front of it, so that it stays newest first.
+
+    The id index spares parsing the saved orders, but a JSON array can't be added
+    to in place: the file is copied over with the new orders in front, so a save
+    still writes the whole history. `saveb()` only writes the new orders.
+
+    A file that is not a JSON array of orders raises a ValueError, it is never
+    overwritten.
+    """
+    if not fp.exists():
         with open(fp, "w", encoding="utf-8") as f:
             dump(orders, f, indent=4)
-    else:
-        if diff := curr_ids.difference(loaded_ids):
-            loaded.extend([i for i in orders if i["order_id"] in diff])
-        with open(fp, "w", encoding="utf-8") as f:
-            dump(loaded, f, indent=4)
+        _append_index(fp, [order["order_id"] for order in orders], fresh=True)
+        return
+    if (known_ids := _read_index(fp)) is None:
+        known_ids = {order["order_id"] for order in loadj(fp)}
+        _append_index(fp, list(known_ids), fresh=True)
+    if orders_new := [i for i in orders if i["order_id"] not in known_ids]:
+        _prepend_json(fp, orders_new)
+        _append_index(fp, [order["order_id"] for order in orders_new])
 
 
 def loadj(fp: Path) -> list[SwiggyOrderDict]:
@@ -28,21 +43,191 @@ def loadj(fp: Path) -> list[SwiggyOrderDict]:
 
 
 def saveb(fp: Path, orders: list[SwiggyOrderDict]) -> None:
-    curr_ids = {order["order_id"] for order in orders}
-    try:
-        with open(fp, "rb") as f:
-            loaded = unpack(f)
-            loaded_ids = {order["order_id"] for order in loaded}
-    except (ValueError, FileNotFoundError):
-        with open(fp, "wb") as f:
-            pack(orders, f)
-    else:
-        if diff := curr_ids.difference(loaded_ids):
-            loaded.extend([i for i in orders if i["order_id"] in diff])
-        with open(fp, "wb") as f:
-            pack(orders, f)
+    """Append the orders not yet in `fp` to it, as a new batch.
+
+    `fp` is a stream of msgpack objects: every save writes the number of orders it
+    adds, followed by one object per order. Files written by older versions (a
+    single array of orders) are a single batch, and are appended to as-is.
+    """
+    if (known_ids := _read_index(fp)) is None:
+        known_ids = _recover_msgpack(fp)
+        _append_index(fp, list(known_ids), fresh=True)
+    if orders_new := [i for i in orders if i["order_id"] not in known_ids]:
+        with open(fp, "ab") as f:
+            pack(len(orders_new), f)
+            for order in orders_new:
+                pack(order, f)
+        _append_index(fp, [order["order_id"] for order in orders_new])
 
 
 def loadb(fp: Path) -> list[SwiggyOrderDict]:
+    # Each save appends newer orders than the ones before it, so the batches are
+    # read back last to first to keep the orders newest first.
+    batches = [batch for batch, _ in _iter_batches(fp)]
+    return [order for batch in reversed(batches) for order in batch]
+
+
+def append_page(
+    fp: Path,
+    cursor: Optional[int],
+    orders: list[SwiggyOrderDict],
+) -> None:
+    with open(fp, "ab") as f:
+        pack(JournalPage(cursor=cursor, orders=orders), f)
+
+
+def iter_journal(fp: Path) -> Iterator[JournalPage]:
     with open(fp, "rb") as f:
-        return unpack(f)
+        yield from Unpacker(f, raw=False)
+
+
+def load_journal(fp: Path) -> list[SwiggyOrderDict]:
+    if not fp.exists():
+        return []
+    return [order for page in iter_journal(fp) for order in page["orders"]]
+
+
+def recover_journal(fp: Path) -> Optional[int]:
+    """Return the cursor to resume fetching from, `None` if there is nothing to resume.
+
+    A page that was only partially written (e.g. the process got killed midway)
+    is dropped, so that pages appended later are readable.
+    """
+    if not fp.exists():
+        return None
+    cursor, end = None, 0
+    with open(fp, "rb+") as f:
+        unpacker = Unpacker(f, raw=False)
+        for page in unpacker:
+            cursor, end = page["orders"][-1]["order_id"], unpacker.tell()
+        f.truncate(end)
+    return cursor
+
+
+def save_refined(fp: Path, orders_refined: list[SwiggyOrderDict]) -> None:
+    """Cache the refined orders of the raw store `fp` in a sidecar file.
+
+    The sidecar is stamped with the size & mtime of `fp`, see `load_refined()`.
+    """
+    stat = fp.stat()
+    tmp = _refined_path(fp).with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        pack([stat.st_size, stat.st_mtime_ns], f)
+        for order in orders_refined:
+            pack(order, f)
+    tmp.replace(_refined_path(fp))
+
+
+def load_refined(fp: Path) -> Optional[list[SwiggyOrderDict]]:
+    """Refined orders cached for `fp`, `None` if `fp` changed since they were saved."""
+    sidecar = _refined_path(fp)
+    if not (fp.exists() and sidecar.exists()):
+        return None
+    stat = fp.stat()
+    with open(sidecar, "rb") as f:
+        records = Unpacker(f, raw=False, max_buffer_size=0)
+        try:
+            if next(records) != [stat.st_size, stat.st_mtime_ns]:
+                return None
+            return list(records)
+        except (StopIteration, ValueError):
+            return None
+
+
+def _iter_msgpack(fp: Path) -> Iterator[Any]:
+    with open(fp, "rb") as f:
+        yield from Unpacker(f, raw=False, max_buffer_size=0)
+
+
+def _iter_batches(fp: Path) -> Iterator[tuple[list[SwiggyOrderDict], int]]:
+    """Batches of orders saved in `fp`, with the offset each one ends at.
+
+    A trailing batch cut short by the end of the file (e.g. the process got killed
+    midway) is left out. Anything else that can't be read raises a ValueError.
+    """
+    batch: list[SwiggyOrderDict] = []
+    size = end = 0
+    with open(fp, "rb") as f:
+        unpacker = Unpacker(f, raw=False, max_buffer_size=0)
+        try:
+            for record in unpacker:
+                if isinstance(record, int) and record > 0 and not size:
+                    size = record
+                    continue
+                if isinstance(record, list) and not size:
+                    batch = record
+                elif isinstance(record, dict) and size:
+                    batch.append(SwiggyOrderDict(record))
+                else:
+                    raise ValueError(f"unexpected {type(record).__name__}")
+                if len(batch) >= size:
+                    end = unpacker.tell()
+                    yield batch, end
+                    batch, size = [], 0
+        except ValueError as error:
+            raise ValueError(f"{fp} is corrupt after byte {end}: {error}") from error
+
+
+def _recover_msgpack(fp: Path) -> set[int]:
+    """Return the order ids in `fp`, dropping a partially written trailing batch.
+
+    A missing file is created, a corrupt one raises a ValueError, see
+    `_iter_batches()`.
+    """
+    fp.touch()
+    order_ids: set[int] = set()
+    end = 0
+    for batch, end in _iter_batches(fp):
+        order_ids.update(order["order_id"] for order in batch)
+    with open(fp, "rb+") as f:
+        f.truncate(end)
+    return order_ids
+
+
+def _prepend_json(fp: Path, orders: list[SwiggyOrderDict]) -> None:
+    # Splice the orders in after the opening bracket and copy the saved ones byte
+    # for byte, so that the file is formatted exactly as if `dump(..., indent=4)`
+    # wrote all the orders at once.
+    elements = ",\n".join(indent(dumps(order, indent=4), " " * 4) for order in orders)
+    tmp = fp.with_name(f"{fp.name}.tmp")
+    with open(fp, "rb") as src:
+        head = src.read(4096).lstrip()
+        if not head.startswith(b"["):
+            raise ValueError(f"{fp} is not a JSON array of orders")
+        rest = head[1:].lstrip()
+        with open(tmp, "wb") as dst:
+            if rest.startswith(b"]"):
+                dst.write(f"[\n{elements}\n]".encode())
+            else:
+                dst.write(f"[\n{elements},\n{' ' * 4}".encode() + rest)
+                copyfileobj(src, dst)
+    tmp.replace(fp)
+
+
+def _refined_path(fp: Path) -> Path:
+    return fp.with_name(f"{fp.name}.refined")
+
+
+def _index_path(fp: Path) -> Path:
+    return fp.with_name(f"{fp.name}.idx")
+
+
+def _read_index(fp: Path) -> Optional[set[int]]:
+    """Order ids saved in `fp` as per its id index, `None` if the index is stale.
+
+    The index is a stream of `[size of fp, [order ids appended]]` records, one per
+    save. It is stale if `fp` was modified after the last save.
+    """
+    index = _index_path(fp)
+    if not (fp.exists() and index.exists()):
+        return None
+    order_ids: set[int] = set()
+    size = -1
+    for size, appended in _iter_msgpack(index):
+        order_ids.update(appended)
+    return order_ids if size == fp.stat().st_size else None
+
+
+def _append_index(fp: Path, order_ids: list[int], fresh: bool = False) -> None:
+    with open(_index_path(fp), "wb" if fresh else "ab") as f:
+        pack([fp.stat().st_size, order_ids], f)
@@ -0,0 +1,29 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from math import ceil
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Shards per worker, more than one so that a slow shard doesn't stall the pool.
+SHARDS_PER_WORKER = 4
+
+
+def map_sharded(func: Callable[[T], R], items: list[T], workers: int = 1) -> list[R]:
+    """`[func(item) for item in items]`, computed across `workers` processes.
+
+    `items` is split in contiguous shards, so the results keep the order of `items`.
+    `func` has to be picklable, i.e. a module level function or a `partial` of one.
+    """
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    size = ceil(len(items) / (workers * SHARDS_PER_WORKER))
+    shards = [items[i : i + size] for i in range(0, len(items), size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(partial(_apply, func), shards)
+        return [result for shard in results for result in shard]
+
+
+def _apply(func: Callable[[T], R], shard: list[T]) -> list[R]:
+    return [func(item) for item in shard]
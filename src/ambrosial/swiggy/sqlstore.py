@@ -0,0 +1,408 @@
+import sqlite3
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from msgpack import packb, unpackb
+
+from ambrosial.swiggy.helper import INDEXES
+from ambrosial.swiggy.utils import SwiggyOrderDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    rank INTEGER NOT NULL,
+    order_id INTEGER NOT NULL UNIQUE,
+    order_time TEXT NOT NULL,
+    restaurant_id TEXT NOT NULL,
+    address_id TEXT NOT NULL,
+    address_version INTEGER NOT NULL,
+    payment_method TEXT,
+    coupon_applied TEXT,
+    order_status TEXT,
+    city TEXT,
+    area TEXT,
+    order_total REAL,
+    raw BLOB NOT NULL,
+    refined BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    order_id INTEGER NOT NULL REFERENCES orders (order_id),
+    item_id TEXT NOT NULL,
+    name TEXT,
+    quantity INTEGER,
+    effective_item_price REAL
+);
+CREATE TABLE IF NOT EXISTS cuisines (
+    order_id INTEGER NOT NULL REFERENCES orders (order_id),
+    cuisine TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS restaurants (
+    restaurant_id TEXT PRIMARY KEY,
+    name TEXT,
+    area_name TEXT,
+    city_name TEXT,
+    lat_lng TEXT
+);
+CREATE TABLE IF NOT EXISTS addresses (
+    address_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    annotation TEXT,
+    area TEXT,
+    city TEXT,
+    lat REAL,
+    lng REAL,
+    PRIMARY KEY (address_id, version)
+);
+CREATE TABLE IF NOT EXISTS offers (
+    order_id INTEGER NOT NULL REFERENCES orders (order_id),
+    coupon_applied TEXT,
+    description TEXT,
+    total_offer_discount REAL
+);
+CREATE TABLE IF NOT EXISTS payments (
+    order_id INTEGER NOT NULL REFERENCES orders (order_id),
+    transactionId TEXT NOT NULL,
+    paymentMethod TEXT,
+    amount REAL
+);
+CREATE INDEX IF NOT EXISTS orders_rank ON orders (rank);
+CREATE INDEX IF NOT EXISTS orders_order_time ON orders (order_time);
+CREATE INDEX IF NOT EXISTS orders_restaurant_id ON orders (restaurant_id);
+CREATE INDEX IF NOT EXISTS orders_address ON orders (address_id, address_version);
+CREATE INDEX IF NOT EXISTS orders_payment_method ON orders (payment_method);
+CREATE INDEX IF NOT EXISTS orders_coupon_applied ON orders (coupon_applied);
+CREATE INDEX IF NOT EXISTS orders_order_status ON orders (order_status);
+CREATE INDEX IF NOT EXISTS orders_city ON orders (city);
+CREATE INDEX IF NOT EXISTS orders_area ON orders (area);
+CREATE INDEX IF NOT EXISTS cuisines_cuisine ON cuisines (cuisine);
+CREATE INDEX IF NOT EXISTS items_item_id ON items (item_id);
+CREATE INDEX IF NOT EXISTS items_order_id ON items (order_id);
+CREATE INDEX IF NOT EXISTS offers_order_id ON offers (order_id);
+CREATE INDEX IF NOT EXISTS payments_transaction_id ON payments (transactionId);
+CREATE INDEX IF NOT EXISTS payments_order_id ON payments (order_id);
+"""
+
+# Posting list queries for each of `INDEXES`, each returns the order ids newest
+# first (in `rank` order), an order id per order line for "items" as in `Cache`.
+# The city, area & cuisine of each order are stored lowercased, as the keys of
+# their `Cache` posting lists.
+POSTINGS = {
+    "items": "SELECT i.order_id FROM items i "
+    "JOIN orders o USING (order_id) WHERE i.item_id = ? ORDER BY o.rank, i.rowid",
+    "resturants": "SELECT order_id FROM orders WHERE restaurant_id = ? ORDER BY rank",
+    "addresses": "SELECT order_id FROM orders WHERE address_id = ? ORDER BY rank",
+    "addresses_ver": "SELECT order_id FROM orders "
+    "WHERE address_id = ? AND address_version = ? ORDER BY rank",
+    "payment": "SELECT p.order_id FROM payments p "
+    "JOIN orders o USING (order_id) WHERE p.transactionId = ? ORDER BY o.rank",
+    "payment_methods": "SELECT order_id FROM orders "
+    "WHERE payment_method = ? ORDER BY rank",
+    "coupons": "SELECT order_id FROM orders WHERE coupon_applied = ? ORDER BY rank",
+    "statuses": "SELECT order_id FROM orders WHERE order_status = ? ORDER BY rank",
+    "cities": "SELECT order_id FROM orders WHERE city = ? ORDER BY rank",
+    "areas": "SELECT order_id FROM orders WHERE area = ? ORDER BY rank",
+    "cuisines": "SELECT c.order_id FROM cuisines c "
+    "JOIN orders o USING (order_id) WHERE c.cuisine = ? ORDER BY o.rank",
+}
+KEYS = {
+    "items": "SELECT DISTINCT item_id FROM items",
+    "resturants": "SELECT DISTINCT restaurant_id FROM orders",
+    "addresses": "SELECT DISTINCT address_id FROM orders",
+    "addresses_ver": "SELECT DISTINCT address_id || '_' || address_version FROM orders",
+    "payment": "SELECT DISTINCT transactionId FROM payments",
+    "payment_methods": "SELECT DISTINCT payment_method FROM orders",
+    "coupons": "SELECT DISTINCT coupon_applied FROM orders "
+    "WHERE coupon_applied IS NOT NULL",
+    "statuses": "SELECT DISTINCT order_status FROM orders",
+    "cities": "SELECT DISTINCT city FROM orders",
+    "areas": "SELECT DISTINCT area FROM orders",
+    "cuisines": "SELECT DISTINCT cuisine FROM cuisines",
+}
+
+
+class _Postings(Mapping):
+    """Read-only stand-in for the `defaultdict(list)` posting lists of `Cache`."""
+
+    def __init__(self, conn: sqlite3.Connection, name: str) -> None:
+        self._conn = conn
+        self._name = name
+
+    def __getitem__(self, key: str) -> list[int]:
+        rows = self._conn.execute(POSTINGS[self._name], _params(self._name, key))
+        if not (order_ids := [row[0] for row in rows]):
+            raise KeyError(key)
+        return order_ids
+
+    def __iter__(self) -> Iterator[str]:
+        return (row[0] for row in self._conn.execute(KEYS[self._name]))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class _Orders(Mapping):
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def __getitem__(self, order_id: int) -> SwiggyOrderDict:
+        query = "SELECT refined FROM orders WHERE order_id = ?"
+        if (row := self._conn.execute(query, (order_id,)).fetchone()) is None:
+            raise KeyError(order_id)
+        return unpackb(row[0])
+
+    def __contains__(self, order_id: object) -> bool:
+        # without unpacking the order, as `Mapping.__contains__()` would
+        query = "SELECT 1 FROM orders WHERE order_id = ? LIMIT 1"
+        return self._conn.execute(query, (order_id,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[int]:
+        return (row[0] for row in self._conn.execute("SELECT order_id FROM orders"))
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+
+class SQLiteStore:
+    """Order store with the lookup interface of `Cache`, backed by a SQLite file.
+
+    Lookups run as indexed queries, so nothing but the requested orders is read.
+    """
+
+    def __init__(self, fp: Path) -> None:
+        self.fp = fp
+        self.conn = sqlite3.connect(fp)
+        self.conn.executescript(SCHEMA)
+        self.orders = _Orders(self.conn)
+        self.items = _Postings(self.conn, "items")
+        self.resturants = _Postings(self.conn, "resturants")
+        self.addresses = _Postings(self.conn, "addresses")
+        self.addresses_ver = _Postings(self.conn, "addresses_ver")
+        self.payment = _Postings(self.conn, "payment")
+        self.payment_methods = _Postings(self.conn, "payment_methods")
+        self.coupons = _Postings(self.conn, "coupons")
+        self.statuses = _Postings(self.conn, "statuses")
+        self.cities = _Postings(self.conn, "cities")
+        self.areas = _Postings(self.conn, "areas")
+        self.cuisines = _Postings(self.conn, "cuisines")
+
+    def save(
+        self,
+        orders_raw: list[SwiggyOrderDict],
+        orders_refined: list[SwiggyOrderDict],
+    ) -> None:
+        """Insert the orders that are not stored yet, in the given order.
+
+        As in `Cache.update()`, they are taken to be newer than the stored orders
+        and are ranked in front of them.
+        """
+        with self.conn:
+            orders_new = [
+                (raw, refined)
+                for raw, refined in zip(orders_raw, orders_refined)
+                if refined["order_id"] not in self.orders
+            ]
+            query = "SELECT COALESCE(MIN(rank), 0) FROM orders"
+            first = self.conn.execute(query).fetchone()[0] - len(orders_new)
+            for rank, (raw, refined) in enumerate(orders_new, start=first):
+                self._insert(rank, raw, refined)
+
+    def load_raw(self) -> list[SwiggyOrderDict]:
+        return self._load("raw")
+
+    def load_refined(self) -> list[SwiggyOrderDict]:
+        return self._load("refined")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # a connection can't be pickled, the copy opens its own
+        return {"fp": self.fp}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        SQLiteStore.__init__(self, state["fp"])
+
+    def get_order(self, order_id: int) -> SwiggyOrderDict:
+        try:
+            return self.orders[order_id]
+        except KeyError:
+            raise ValueError(
+                f"order_id {repr(order_id)}{type(order_id)} doesn't exist."
+            ) from None
+
+    def get_item(self, item_id: str) -> SwiggyOrderDict:
+        if (order_id := self._first("items", item_id)) is not None:
+            return self.get_order(order_id=order_id)
+        raise ValueError(f"item_id {repr(item_id)}{type(item_id)} doesn't exist.")
+
+    def get_restaurant(self, restaurant_id: str) -> SwiggyOrderDict:
+        if (order_id := self._first("resturants", restaurant_id)) is not None:
+            return self.get_order(order_id=order_id)
+        raise ValueError(
+            f"restaurant_id {repr(restaurant_id)}{type(restaurant_id)} doesn't exist."
+        )
+
+    def get_address(self, address_id: str) -> SwiggyOrderDict:
+        if (order_id := self._first("addresses", address_id)) is not None:
+            return self.get_order(order_id=order_id)
+        raise ValueError(
+            f"address_id {repr(address_id)}{type(address_id)} doesn't exist."
+        )
+
+    def get_address_w_ver(self, address_id: str, ver: int) -> SwiggyOrderDict:
+        address_id = f"{address_id}_{ver}"
+        if (order_id := self._first("addresses_ver", address_id)) is not None:
+            return self.get_order(order_id=order_id)
+        raise ValueError(
+            f"address_id,version_id {repr(address_id)}{type(address_id)},"
+            f"{repr(ver)}{type(ver)} doesn't exist."
+        )
+
+    def get_offer(self, order_id: int) -> SwiggyOrderDict:
+        return self.get_order(order_id=order_id)
+
+    def get_payment(self, transaction_id: str) -> SwiggyOrderDict:
+        if (order_id := self._first("payment", transaction_id)) is not None:
+            return self.get_order(order_id=order_id)
+        raise ValueError(
+            f"payment_id {repr(transaction_id)}{type(transaction_id)} doesn't exist."
+        )
+
+    def orders_between(self, start: datetime, end: datetime) -> list[SwiggyOrderDict]:
+        """Orders placed from `start` up to, but excluding, `end`, newest first."""
+        rows = self.conn.execute(
+            "SELECT refined FROM orders WHERE order_time >= ? AND order_time < ? "
+            "ORDER BY order_time DESC, rank",
+            (_timestamp(start), _timestamp(end)),
+        )
+        return [unpackb(row[0]) for row in rows]
+
+    def orders_with(self, index: str, key: str) -> list[SwiggyOrderDict]:
+        """All the orders in the posting list of `key` in `index`, see `INDEXES`."""
+        if index not in INDEXES:
+            raise KeyError(
+                f"Invalid index: {repr(index)}. Available indexes: {repr(INDEXES)}"
+            )
+        if index in ("cities", "areas", "cuisines"):
+            key = key.lower()
+        order_ids = getattr(self, index).get(key, [])
+        return [self.orders[order_id] for order_id in dict.fromkeys(order_ids)]
+
+    def _first(self, name: str, key: str) -> Optional[int]:
+        query = f"{POSTINGS[name]} LIMIT 1"
+        row = self.conn.execute(query, _params(name, key)).fetchone()
+        return None if row is None else row[0]
+
+    def _load(self, column: str) -> list[SwiggyOrderDict]:
+        rows = self.conn.execute(f"SELECT {column} FROM orders ORDER BY rank")
+        return [unpackb(row[0]) for row in rows]
+
+    def _insert(self, rank: int, raw: SwiggyOrderDict, order: SwiggyOrderDict) -> None:
+        order_id = order["order_id"]
+        address = order["delivery_address"]
+        self.conn.execute(
+            "INSERT INTO orders (rank, order_id, order_time, restaurant_id, "
+            "address_id, address_version, payment_method, coupon_applied, "
+            "order_status, city, area, order_total, raw, refined) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                rank,
+                order_id,
+                _timestamp(datetime.fromisoformat(order["order_time"])),
+                order["restaurant_id"],
+                address["id"],
+                address["version"],
+                order["payment_method"],
+                order["coupon_applied"] or None,
+                order["order_status"],
+                order["restaurant_city_name"].lower(),
+                order["restaurant_area_name"].lower(),
+                order["order_total"],
+                packb(raw),
+                packb(order),
+            ),
+        )
+        self.conn.executemany(
+            "INSERT INTO items VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    order_id,
+                    item["item_id"],
+                    item["name"],
+                    item["quantity"],
+                    item["effective_item_price"],
+                )
+                for item in order["order_items"]
+            ],
+        )
+        self.conn.executemany(
+            "INSERT INTO cuisines VALUES (?, ?)",
+            [
+                (order_id, cuisine)
+                for cuisine in dict.fromkeys(
+                    c.lower() for c in order["restaurant_cuisine"]
+                )
+            ],
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO restaurants VALUES (?, ?, ?, ?, ?)",
+            (
+                order["restaurant_id"],
+                order["restaurant_name"],
+                order["restaurant_area_name"],
+                order["restaurant_city_name"],
+                order["restaurant_lat_lng"],
+            ),
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO addresses VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                address["id"],
+                address["version"],
+                address["annotation"],
+                address["area"],
+                address["city"],
+                address["lat"],
+                address["lng"],
+            ),
+        )
+        self.conn.executemany(
+            "INSERT INTO offers VALUES (?, ?, ?, ?)",
+            [
+                (
+                    order_id,
+                    order["coupon_applied"],
+                    offer["description"],
+                    offer["total_offer_discount"],
+                )
+                for offer in _offers(order)
+            ],
+        )
+        self.conn.executemany(
+            "INSERT INTO payments VALUES (?, ?, ?, ?)",
+            [
+                (
+                    order_id,
+                    payment["transactionId"],
+                    payment["paymentMethod"],
+                    payment["amount"],
+                )
+                for payment in order["payment_transactions"] or []
+            ],
+        )
+
+
+def _params(name: str, key: str) -> tuple[str, ...]:
+    # "<address_id>_<version>" keys are split to make use of the `orders_address` index
+    return tuple(key.rsplit("_", 1)) if name == "addresses_ver" else (key,)
+
+
+def _timestamp(time: datetime) -> str:
+    # fixed width, so that timestamps compare as text the way they do as datetimes
+    return time.isoformat(" ", timespec="microseconds")
+
+
+def _offers(order: SwiggyOrderDict) -> list[dict[str, Any]]:
+    return [] if order["offers_data"] == "" else order["offers_data"]
@@ -1,12 +1,13 @@
 from ast import literal_eval
 from http.cookiejar import Cookie, CookieJar
 from http.cookies import CookieError
+from json import JSONDecodeError, loads
 from pathlib import Path
 from time import time
-from typing import Any, NewType, TypedDict
+from typing import TYPE_CHECKING, Any, NewType, TypedDict
 
-import browser_cookie3
-from requests import HTTPError, Response
+if TYPE_CHECKING:
+    from requests import Response
 
 SwiggyOrderDict = NewType("SwiggyOrderDict", dict[str, Any])
 
@@ -65,7 +66,9 @@ def create_path(path_: Path) -> None:
         path_.mkdir(parents=True, exist_ok=True)
 
 
-def validate_response(response: Response) -> None:
+def validate_response(response: "Response") -> None:
+    from requests import HTTPError
+
     response.raise_for_status()
     resp_json = response.json()
     if not resp_json["statusCode"] == 0:
@@ -73,32 +76,68 @@ def validate_response(response: Response) -> None:
 
 
 def get_cookies(domain_name: str) -> CookieJar:
+    import browser_cookie3
+
     cookie_jar = browser_cookie3.firefox(domain_name=domain_name)
     if not len(cookie_jar) > 0:
         raise CookieError(f"{repr(domain_name)}: No cookies found.")
     return cookie_jar
 
 
+def parse_payload(payload: str, booleans: bool = False) -> Any:
+    """Parse an embedded JSON payload, falling back to `literal_eval` for payloads
+    that are Python literals instead.
+
+    With `booleans`, JSON style ``true``/``false`` are converted before the fallback.
+    """
+    try:
+        return loads(payload)
+    except JSONDecodeError:
+        if booleans:
+            payload = payload.replace("false", "False").replace("true", "True")
+        return literal_eval(payload)
+
+
 def fix_payment(order: SwiggyOrderDict) -> SwiggyOrderDict:
-    for ind, transaction in enumerate(order["payment_transactions"]):
+    """Return `order` with parsed `extPGResponse` payloads.
+
+    `order` is left untouched, only the transactions that change are copied.
+    """
+    transactions = order["payment_transactions"]
+    for ind, transaction in enumerate(transactions):
         pg_response = transaction["paymentMeta"]["extPGResponse"]
         if pg_response.__class__ is str and pg_response != "":
-            pg_response = pg_response.replace("false", "False")
-            pg_response = pg_response.replace("true", "True")
-            transaction["paymentMeta"]["extPGResponse"] = literal_eval(pg_response)
-            order["payment_transactions"][ind] = transaction
-    return order
+            if transactions is order["payment_transactions"]:
+                transactions = list(transactions)
+            transactions[ind] = {
+                **transaction,
+                "paymentMeta": {
+                    **transaction["paymentMeta"],
+                    "extPGResponse": parse_payload(pg_response, booleans=True),
+                },
+            }
+    if transactions is order["payment_transactions"]:
+        return order
+    return SwiggyOrderDict({**order, "payment_transactions": transactions})
 
 
 def process_orders(order: SwiggyOrderDict) -> SwiggyOrderDict:
-    order = fix_payment(order)
+    """Return the refined copy of a raw `order`, the raw order is not modified.
+
+    The copy is shallow: fields that are not refined are shared with `order`.
+    """
+    order = SwiggyOrderDict(dict(fix_payment(order)))
     if order["offers_data"].__class__ is str and order["offers_data"] != "":
-        order["offers_data"] = literal_eval(order["offers_data"])
+        order["offers_data"] = parse_payload(order["offers_data"])
     if order.get("rating_meta", None) is None:
         order["rating_meta"] = {
             "restaurant_rating": {"rating": 0},
             "delivery_rating": {"rating": 0},
         }
     else:
-        order["rating_meta"].pop("asset_id", None)
+        order["rating_meta"] = {
+            key: value
+            for key, value in order["rating_meta"].items()
+            if key != "asset_id"
+        }
     return order
@@ -0,0 +1,26 @@
+from pathlib import Path
+from shutil import copy2, rmtree
+from tempfile import mkdtemp
+
+import pytest
+
+_monkeypatch = pytest.MonkeyPatch()
+_home = Path(mkdtemp(prefix="ambrosial-tests-"))
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    # The tests load the orders saved in ~/.ambrosial/data, and loading or saving
+    # them writes next to them (the refined orders, the id indexes, ...). They run
+    # on a copy instead, so that the real data directory is left as is.
+    data = Path.home() / ".ambrosial" / "data"
+    (_home / ".ambrosial" / "data").mkdir(parents=True, exist_ok=True)
+    for fname in ("orders.json", "orders.msgpack"):
+        if (data / fname).exists():
+            copy2(data / fname, _home / ".ambrosial" / "data" / fname)
+    # only the home of ambrosial moves, browser cookies are read from the real one
+    _monkeypatch.setattr(Path, "home", classmethod(lambda cls: _home))
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    _monkeypatch.undo()
+    rmtree(_home, ignore_errors=True)
@@ -80,3 +80,30 @@ def test_swan_items():
         swan.items.search_item(name=item.name[1:-1], exact=False)
         swan.items.search_item(name=item.name, exact=True)
     assert 1 == 1
+
+
+def test_search_item():
+    for item in swiggy.get_items():
+        for name, exact in ((item.name, True), (item.name[1:-1], False)):
+            expected = [
+                i
+                for i in swan.items.all_items
+                if (
+                    name.lower() == i.name.lower()
+                    if exact
+                    else name.lower() in i.name.lower()
+                )
+            ]
+            assert swan.items.search_item(name=name, exact=exact) == expected
+    assert swan.items.search_item(name="no such item") == []
+    for item in swiggy.get_items():
+        prefix = item.name[: len(item.name) // 2]
+        assert swan.items.search_item(name=prefix, mode="prefix") == [
+            i for i in swan.items.all_items if i.name.lower().startswith(prefix.lower())
+        ]
+    with pytest.raises(KeyError):
+        swan.items.search_item(name=item.name, mode="fuzzy")  # type: ignore[arg-type]
+    item = swiggy.get_items()[0]
+    typo = item.name[:-1] + "x" if len(item.name) > 4 else item.name
+    assert item.name.lower() in swan.items.suggest_item(typo)
+    assert len(swan.items.suggest_item(item.name, limit=1)) == 1
@@ -1,9 +1,13 @@
+import json
+import pickle
+from collections import Counter
 from itertools import combinations
 from random import choices
 
 import pytest
 
 from ambrosial.swan import SwiggyAnalytics
+from ambrosial.swan.frame import compile_bins
 from ambrosial.swich import SwiggyChart
 from ambrosial.swiggy import Swiggy
 from ambrosial.swiggy.datamodel.order import Order
@@ -53,3 +57,61 @@ def test_swan_orders():
         swan.orders.tseries_super_benefits(bins)
         swan.orders.tseries_furthest_order(bins)
     assert 1 == 1
+
+
+def test_tseries_frame():
+    # reference: group the order models on the formatted order time
+    for bins in choices(possible_bins, k=20):
+        keys = list(dict.fromkeys(bins.split("+")))
+        mapping = swan.orders.strftime_mapping
+        amount: dict[str, int] = {}
+        charges: dict[str, Counter] = {}
+        for order in sorted(swan.orders.all_orders, key=lambda o: o.order_time):
+            label = " ".join(order.order_time.strftime(mapping[k]) for k in keys)
+            amount[label] = amount.get(label, 0) + order.order_total
+            charges[label] = charges.get(label, Counter()) + Counter(order.charges)
+        assert swan.orders.tseries_amount(bins) == amount
+        assert swan.orders.tseries_charges(bins) == {
+            label: dict(charge) for label, charge in charges.items()
+        }
+        assert set(swan.orders.tseries_count(bins)) == set(amount)
+
+
+def test_compile_bins():
+    spec = compile_bins("year+month_+year")
+    assert spec is compile_bins("year+month_+year")
+    assert spec.components == ("year", "month_")
+    assert swan.orders.frame.bins(spec) is swan.orders.frame.bins(spec)
+    with pytest.raises(KeyError):
+        compile_bins("year+foo")
+
+
+def test_aggregate():
+    metrics = ["amount", "count", "del_time", "distance", "super_benefits"]
+    aggregated = swan.orders.aggregate("year+month_", metrics)
+    assert list(aggregated) == list(swan.orders.tseries_count("year+month_"))
+    for metric in metrics:
+        assert getattr(swan.orders, f"tseries_{metric}")("year+month_") == {
+            label: values[metric]
+            for label, values in aggregated.items()
+            if metric in values
+        }
+    with pytest.raises(KeyError):
+        swan.orders.aggregate("year", ["amount", "foo"])
+
+
+def test_memoized():
+    first = swan.orders.tseries_amount("per_day")
+    first.clear()
+    assert swan.orders.tseries_amount("per_day")
+    memo = swan.orders._memo
+    assert ("aggregate", "per_day", ("amount",), "minute") in memo
+    aggregated = swan.orders.aggregate("per_day", ["amount"])
+    next(iter(aggregated.values()))["amount"] = -1
+    assert swan.orders.aggregate("per_day", ["amount"]) != aggregated
+    assert json.loads(json.dumps(aggregated)) == aggregated
+    assert pickle.loads(pickle.dumps(swan.orders))._memo == memo
+    # results are thrown away once the orders of swiggy change
+    swiggy._version += 1
+    swan.orders.tseries_count("per_day")
+    assert list(swan.orders._memo) == [("aggregate", "per_day", ("count",), "minute")]
@@ -40,3 +40,36 @@ def test_swan_restaurants():
             swan.restaurants.search_cuisine(cuisine=cuisine, exact=True)
             swan.restaurants.search_cuisine(cuisine=cuisine[1:-1], exact=False)
     assert 1 == 1
+
+
+def test_search_restaurant():
+    all_rest = swan.restaurants.all_restaurants
+    for rest in set(swiggy.get_restaurants()):
+        name_area = (rest.name.lower(), rest.area_name.lower())
+        assert swan.restaurants.search_restaurant(rest.name, rest.area_name) == [
+            r for r in all_rest if (r.name.lower(), r.area_name.lower()) == name_area
+        ]
+        prefix = rest.name[:-1]
+        assert swan.restaurants.search_restaurant(prefix, mode="prefix") == [
+            r for r in all_rest if r.name.lower().startswith(prefix.lower())
+        ]
+        name, area = rest.name[1:-1], rest.area_name[1:]
+        assert swan.restaurants.search_restaurant(name, area, exact=False) == [
+            r
+            for r in all_rest
+            if name.lower() in r.name.lower() and area.lower() in r.area_name.lower()
+        ]
+        assert swan.restaurants.search_restaurant(name, exact=False) == [
+            r for r in all_rest if name.lower() in r.name.lower()
+        ]
+        for cuisine in rest.cuisine:
+            assert swan.restaurants.search_cuisine(cuisine) == [
+                r for r in all_rest if cuisine.lower() in r.cuisine
+            ]
+            assert swan.restaurants.search_cuisine(cuisine[1:-1], exact=False) == [
+                r
+                for r in all_rest
+                if any(cuisine[1:-1].lower() in c for c in r.cuisine)
+            ]
+        typo = rest.name[:-1] + "x" if len(rest.name) > 4 else rest.name
+        assert rest.name.lower() in swan.restaurants.suggest_restaurant(typo)
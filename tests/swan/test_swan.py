@@ -1,3 +1,7 @@
+import subprocess
+import sys
+from pathlib import Path
+
 import pytest
 
 from ambrosial.swan import SwiggyAnalytics
@@ -40,3 +44,62 @@ def test_swan_offer():
         swan.offers.grouped_instances(attr)
         for attr2 in Offer.__annotations__:
             swan.offers.grouped_instances(key=attr, attr=attr2)
+
+
+def test_apply_new_orders(tmp_path: Path):
+    new = 5
+    older = Swiggy(path=tmp_path, ddav=True)
+    older.orders_raw = swiggy.orders_raw[new:]
+    older.savej()
+    older.loadj()
+    older_swan = SwiggyAnalytics(older)
+    older_swan.orders.tseries_amount("per_day")
+    older_swan.orders.tseries_del_time("year+month_")
+    pages = [swiggy.orders_raw[:10], swiggy.orders_raw[10:20]]
+    older._iter_pages = lambda order_id=None: iter(pages)
+    older.fetch_orders(incremental=True)
+    older_swan.apply_new_orders(older.get_orders()[:new])
+    # the time series are carried over, with only the bins of the new orders updated
+    assert list(older_swan.orders._memo) == [
+        ("aggregate", "per_day", ("amount",), "minute"),
+        ("aggregate", "year+month_", ("del_time",), "minute"),
+    ]
+    assert older_swan.orders.tseries_amount("per_day") == swan.orders.tseries_amount(
+        "per_day"
+    )
+    assert older_swan.orders.tseries_del_time(
+        "year+month_"
+    ) == swan.orders.tseries_del_time("year+month_")
+    assert older_swan.items.items_map == swan.items.items_map
+    assert older_swan.restaurants.cuisines() == swan.restaurants.cuisines()
+    assert older_swan.offers.statistics() == swan.offers.statistics()
+    assert older_swan.addresses.all_orders == swan.addresses.all_orders
+    delivery_time_stats = older_swan.addresses.delivery_time_stats()
+    assert delivery_time_stats == swan.addresses.delivery_time_stats()
+
+
+def test_lazy_analytics():
+    lazy = SwiggyAnalytics(swiggy)
+    assert "items" not in lazy.__dict__
+    assert lazy.items is lazy.items
+    assert set(lazy.__dict__) == {"swiggy", "items"}
+    chart = SwiggyChart(lazy)
+    assert "heatmap" not in chart.__dict__
+    assert chart.heatmap is chart.heatmap
+
+
+def test_deferred_imports():
+    code = (
+        "import sys, ambrosial.swich; "
+        "print([m for m in ('requests', 'matplotlib', 'pandas') if m in sys.modules])"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    assert out.stdout.strip() == "[]"
+    from ambrosial.swich import HeatMap
+    from ambrosial.swich.heatmap import HeatMap as heatmap_cls
+
+    assert HeatMap is heatmap_cls
+    with pytest.raises(ImportError):
+        from ambrosial.swich import Plotter  # noqa: F401
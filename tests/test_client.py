@@ -0,0 +1,61 @@
+from http.cookiejar import CookieJar
+from time import monotonic
+from typing import Any
+
+import pytest
+from requests import ConnectionError, Response
+
+from ambrosial.swiggy.client import FetchClient, TokenBucket
+
+
+def _response(status_code: int) -> Response:
+    response = Response()
+    response.status_code = status_code
+    return response
+
+
+def _client(responses: list, max_retries: int = 3) -> FetchClient:
+    client = FetchClient(
+        CookieJar(),
+        max_retries=max_retries,
+        backoff=0.001,
+        rate_limit=None,
+    )
+
+    def fake_get(*_: Any, **__: Any) -> Response:
+        result = responses.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    client.session.get = fake_get
+    return client
+
+
+def test_retry_transient_errors():
+    responses = [_response(503), ConnectionError(), _response(429), _response(200)]
+    assert _client(responses).get("https://example.com").status_code == 200
+    assert responses == []
+
+
+def test_retry_exhausted():
+    responses = [_response(502)] * 3
+    assert _client(responses, max_retries=2).get("https://a.b").status_code == 502
+    with pytest.raises(ConnectionError):
+        _client([ConnectionError()] * 3, max_retries=2).get("https://a.b")
+
+
+def test_no_retry_on_client_error():
+    responses = [_response(403), _response(200)]
+    assert _client(responses).get("https://example.com").status_code == 403
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=50, capacity=2)
+    start = monotonic()
+    for _ in range(7):
+        bucket.acquire()
+    # two tokens are available upfront, the remaining five are refilled at 50/s
+    assert monotonic() - start >= 5 / 50 * 0.9
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
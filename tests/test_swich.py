@@ -1,7 +1,13 @@
+from pathlib import Path
 from random import choices
 
+import matplotlib.pyplot as plt
+import pytest
+
 from ambrosial.swan import SwiggyAnalytics
 from ambrosial.swich import SwiggyChart
+from ambrosial.swich.helper.heatmap import MONTH, _skeleton, get_dataframe
+from ambrosial.swich.utils import outlier_mask, remove_outliers
 from ambrosial.swiggy import Swiggy
 
 swiggy = Swiggy(ddav=True)
@@ -73,3 +79,72 @@ def test_swich_map():
     swich.map.count_density(city="chennai")
     swich.map.amount_density(nationwide=True)
     assert 1 == 1
+
+
+def test_remove_outliers():
+    amount = [100.0 + i % 7 for i in range(200)] + [5000.0, 100.0]
+    fee = [10.0 + i % 3 for i in range(200)] + [11.0, 900.0]
+    on_time = [True] * 202
+    kept_amount, kept_fee, kept_on_time = remove_outliers(amount, fee, on_time)
+    assert kept_amount.tolist() == amount[:200]
+    assert kept_fee.tolist() == fee[:200]
+    assert kept_on_time.dtype == bool and len(kept_on_time) == 200
+    # columns are checked on the rows kept by the ones before
+    assert outlier_mask(amount, fee).sum() == 200
+    assert outlier_mask(amount, fee, method="iqr").sum() == 200
+    assert outlier_mask(amount, fee, method="mad").sum() == 200
+    assert outlier_mask(amount, method="zscore", tolerance=100).all()
+    assert len(amount) == 202
+    with pytest.raises(KeyError):
+        outlier_mask(amount, method="sigma")
+    for method in ("zscore", "iqr", "mad"):
+        assert outlier_mask([], [], method=method).tolist() == []
+
+
+def test_heatmap_dataframe():
+    data = swan.orders.tseries_count("month_+day")
+    df = get_dataframe(dict(data), ["month_", "day"])
+    assert df.shape == (12, 31)
+    assert list(df.index) == list(MONTH)
+    assert df.loc["February", "30"] != df.loc["February", "30"]
+    assert df.stack().sum() == sum(data.values())
+    empty = get_dataframe({}, ["week_", "hour"])
+    assert empty.shape == (7, 24) and empty.isna().all(axis=None)
+    assert _skeleton(("week_", "hour")) is _skeleton(("week_", "hour"))
+
+
+def test_render_all(tmp_path: Path):
+    specs = [
+        ("heatmap.order_count", {"bins": "month_+week_"}),
+        "regplot.ordtime_orddist",
+        "wcloud.restaurant_cuisine",
+        ("map.count_density", {"city": "chennai"}),
+    ]
+    files = swich.render_all(specs, workers=2, out_dir=tmp_path)
+    assert [fp.name for fp in files] == [
+        "0_heatmap_order_count.png",
+        "1_regplot_ordtime_orddist.png",
+        "2_wcloud_restaurant_cuisine.png",
+        "3_map_count_density.html",
+    ]
+    assert all(fp.stat().st_size > 0 for fp in files)
+    # the aggregates are computed once, before the workers are started
+    assert ("aggregate", "month_+week_", ("count",), "minute") in swan.orders._memo
+    assert ("aggregate", "per_minute_", ("amount",), "minute") in swan.orders._memo
+    assert swich.render_all(specs[:1], out_dir=tmp_path) == files[:1]
+    no_offers = Swiggy(path=tmp_path, ddav=True)
+    no_offers.orders_raw = [
+        order for order in swiggy.orders_raw if not order["offers_data"]
+    ]
+    no_offers.savej()
+    no_offers.loadj()
+    empty = ["wcloud.coupon_code", ("map.count_density", {"city": "nowhere"})]
+    no_offers_chart = SwiggyChart(SwiggyAnalytics(no_offers))
+    assert no_offers_chart.render_all(empty, out_dir=tmp_path) == [None, None]
+    # the figures of the caller are left open
+    figure = plt.figure()
+    swich.render_all(specs[:2], out_dir=tmp_path)
+    assert plt.fignum_exists(figure.number)
+    plt.close(figure)
+    with pytest.raises(KeyError):
+        swich.render_all(["heatmap"], out_dir=tmp_path)
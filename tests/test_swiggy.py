@@ -1,6 +1,24 @@
+import json
+import pickle
+from collections import Counter
+from copy import deepcopy
+from datetime import datetime, timedelta
+from http.cookiejar import CookieJar
+from pathlib import Path
+from typing import Any, Optional
+
+import msgpack
+import pytest
+from requests import Response
+
+import ambrosial.swiggy.convert as convert
+import ambrosial.swiggy.iohandler as ioh
+import ambrosial.swiggy.utils as utils
 from ambrosial.swan import SwiggyAnalytics
 from ambrosial.swich import SwiggyChart
 from ambrosial.swiggy import Swiggy
+from ambrosial.swiggy.client import FetchClient
+from ambrosial.swiggy.helper import INDEXES, Cache
 
 swiggy = Swiggy(ddav=True)
 swiggy.loadj()
@@ -26,6 +44,20 @@ def test_startup():
     assert 1 == 1
 
 
+def test_offline(monkeypatch: pytest.MonkeyPatch):
+    def no_cookies(domain_name: str) -> CookieJar:
+        raise AssertionError("cookies read")
+
+    monkeypatch.setattr(utils, "get_cookies", no_cookies)
+    offline = Swiggy(ddav=True, offline=True)
+    offline.loadj()
+    assert offline.get_orders() == swiggy.get_orders()
+    with pytest.raises(ConnectionError):
+        offline.fetch_orders()
+    with pytest.raises(AssertionError):
+        Swiggy()._cookie_jar
+
+
 def test_swiggy_fetch_methods():
     swiggy.fetch_orders()
     assert 1 == 1
@@ -72,3 +104,369 @@ def test_swiggy_get_payment():
 def test_swiggy_get_offer():
     for offer in swiggy.get_offers():
         assert offer in swiggy.get_offer(offer.order_id)
+
+
+def test_cache_update():
+    split = len(swiggy.orders_refined) // 3
+    cache = Cache(swiggy.orders_refined[split:])
+    cache.update(swiggy.orders_refined[:split])
+    assert cache.orders == swiggy.cache.orders
+    assert cache.items == swiggy.cache.items
+    assert cache.resturants == swiggy.cache.resturants
+    assert cache.addresses == swiggy.cache.addresses
+    assert cache.addresses_ver == swiggy.cache.addresses_ver
+    assert cache.payment == swiggy.cache.payment
+    for index in INDEXES:
+        assert getattr(cache, index) == getattr(swiggy.cache, index)
+    assert cache._time_ids == swiggy.cache._time_ids
+
+
+def test_cache_indexes():
+    cache = swiggy.cache
+    times = sorted(
+        datetime.fromisoformat(o["order_time"]) for o in cache.orders_refined
+    )
+    start, end = times[len(times) // 4], times[len(times) // 2]
+    assert cache.orders_between(start, end) == [
+        order
+        for order in cache.orders_refined
+        if start <= datetime.fromisoformat(order["order_time"]) < end
+    ]
+    city = cache.orders_refined[0]["restaurant_city_name"]
+    assert cache.orders_with("cities", city.upper()) == [
+        order
+        for order in cache.orders_refined
+        if order["restaurant_city_name"].lower() == city.lower()
+    ]
+    assert cache.orders_with("cuisines", "pizzas") == [
+        order
+        for order in cache.orders_refined
+        if "pizzas" in {c.lower() for c in order["restaurant_cuisine"]}
+    ]
+    assert cache.orders_with("coupons", "") == []
+    with pytest.raises(KeyError):
+        cache.orders_with("orders", "")
+
+
+def test_journal(tmp_path: Path):
+    journal = tmp_path / "orders.journal"
+    assert ioh.recover_journal(journal) is None
+    assert ioh.load_journal(journal) == []
+    pages = [swiggy.orders_raw[i : i + 10] for i in range(0, 30, 10)]
+    cursor = None
+    for page in pages:
+        ioh.append_page(journal, cursor, page)
+        cursor = page[-1]["order_id"]
+    with open(journal, "ab") as f:
+        f.write(b"\x82\xa6cursor")  # partially written page
+    assert ioh.recover_journal(journal) == cursor
+    assert ioh.load_journal(journal) == swiggy.orders_raw[:30]
+
+
+def test_append_only_store(tmp_path: Path):
+    orders = swiggy.orders_raw
+    for fname, save, load in (
+        ("orders.msgpack", ioh.saveb, ioh.loadb),
+        ("orders.json", ioh.savej, ioh.loadj),
+    ):
+        fp = tmp_path / fname
+        save(fp, orders[100:])
+        save(fp, orders[50:150])
+        size = fp.stat().st_size
+        save(fp, orders[60:])
+        assert fp.stat().st_size == size
+        save(fp, orders[:60])
+        # newer orders are saved later, and loaded back first
+        assert load(fp) == orders
+    assert (tmp_path / "orders.json").read_text() == json.dumps(orders, indent=4)
+
+
+def test_corrupt_store(tmp_path: Path):
+    orders = swiggy.orders_raw
+    fp = tmp_path / "orders.msgpack"
+    ioh.saveb(fp, orders[50:])
+    size = fp.stat().st_size
+    with open(fp, "ab") as f:
+        f.write(msgpack.packb(10) + msgpack.packb(orders[0])[:-5])
+    # the partially written batch is dropped on the next save
+    ioh.saveb(fp, orders[:50])
+    assert ioh.loadb(fp) == orders
+    with open(fp, "rb+") as f:
+        f.seek(size // 2)
+        f.write(b"\xc1" * 8)
+    corrupt = fp.read_bytes()
+    (tmp_path / "orders.msgpack.idx").unlink()
+    with pytest.raises(ValueError):
+        ioh.saveb(fp, orders)
+    assert fp.read_bytes() == corrupt
+    fp = tmp_path / "orders.json"
+    fp.write_text("not json")
+    with pytest.raises(ValueError):
+        ioh.savej(fp, orders)
+    assert fp.read_text() == "not json"
+
+
+def test_sqlite_store(tmp_path: Path):
+    saved = Swiggy(path=tmp_path, ddav=True)
+    saved.orders_raw = swiggy.orders_raw[50:]
+    saved.orders_refined = swiggy.orders_refined[50:]
+    saved.saves()
+    # orders saved later are newer, they are ranked in front of the stored ones
+    saved.orders_raw = swiggy.orders_raw
+    saved.orders_refined = swiggy.orders_refined
+    saved.saves()
+    saved.saves()
+    loaded = Swiggy(path=tmp_path, ddav=True)
+    loaded.loads()
+    assert loaded._fetched is True
+    assert loaded._orders_raw is None
+    for order in swiggy.get_orders()[:25]:
+        assert order == loaded.get_order(order.order_id)
+        for item in order.items:
+            assert item == loaded.get_item(item.item_id)
+        assert order.restaurant == loaded.get_restaurant(order.restaurant.rest_id)
+        assert order.address == loaded.get_address(
+            order.address.address_id, ver=order.address.version
+        )
+    for index in INDEXES:
+        assert dict(getattr(loaded.cache, index)) == dict(getattr(swiggy.cache, index))
+    assert loaded.cache.orders_with("cuisines", "Pizzas") == swiggy.cache.orders_with(
+        "cuisines", "Pizzas"
+    )
+    assert swiggy.orders_raw[0]["order_id"] in loaded.cache.orders
+    assert -1 not in loaded.cache.orders
+    with pytest.raises(KeyError):
+        loaded.cache.items["-1"]
+    assert loaded.cache.orders_with("items", "-1") == []
+    times = sorted(
+        datetime.fromisoformat(o["order_time"]) for o in saved.orders_refined
+    )
+    for start, end in (
+        (times[10], times[-10]),
+        (times[10] + timedelta(microseconds=1), times[-10]),
+        (times[0], times[-1] + timedelta(seconds=1)),
+    ):
+        between = loaded.cache.orders_between(start, end)
+        assert between == swiggy.cache.orders_between(start, end)
+    assert loaded.orders_raw == swiggy.orders_raw
+    assert len(loaded.get_orders()) == len(swiggy.orders_refined)
+
+
+def test_fetch_orders(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    orders = swiggy.orders_raw
+    order_ids = [order["order_id"] for order in orders]
+    closed = []
+
+    def fake_get(
+        client: FetchClient, url: str, params: Optional[dict[str, Any]] = None
+    ) -> Response:
+        # pages of 10 orders, each after the `order_id` cursor
+        start = order_ids.index(params["order_id"]) + 1 if params else 0
+        response = Response()
+        response.status_code = 200
+        response._content = json.dumps(
+            {"statusCode": 0, "data": {"orders": orders[start : start + 10]}}
+        ).encode()
+        return response
+
+    monkeypatch.setattr(utils, "get_cookies", lambda domain_name: CookieJar())
+    monkeypatch.setattr(FetchClient, "get", fake_get)
+    monkeypatch.setattr(FetchClient, "close", lambda client: closed.append(client))
+    fetched = Swiggy(path=tmp_path, ddav=True)
+    fetched.fetch_orders()
+    assert fetched.orders_raw == orders
+    assert fetched.get_orders() == swiggy.get_orders()
+    assert len(closed) == 1 and fetched._client is None
+    ioh.saveb(tmp_path / "data" / "orders.msgpack", orders[25:])
+    incremental = Swiggy(path=tmp_path, ddav=True)
+    incremental.fetch_orders(incremental=True)
+    assert incremental.orders_raw == orders
+    assert incremental.get_order(order_ids[0]) == swiggy.get_order(order_ids[0])
+    assert len(closed) == 2
+    with pytest.raises(ValueError):
+        incremental.fetch_orders(incremental=True, checkpoint=True)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_columnar_tables(tmp_path: Path, fmt: str):
+    pytest.importorskip("pyarrow")
+    exporter = Swiggy(path=tmp_path, ddav=True)
+    exporter.orders_refined = swiggy.orders_refined
+    exporter.export_tables(fmt=fmt)
+    tables = exporter.load_tables(fmt=fmt)
+    orders = swiggy.get_orders()
+    assert tables["orders"]["order_id"].to_pylist() == [o.order_id for o in orders]
+    assert tables["orders"]["order_total"].to_pylist() == [
+        o.order_total for o in orders
+    ]
+    assert tables["order_items"].num_rows == len(swiggy.get_items())
+    assert tables["payments"].num_rows == len(swiggy.get_payments())
+    assert tables["offers"].num_rows == len(swiggy.get_offers())
+    assert tables["restaurants"].num_rows == len(swiggy.cache.resturants)
+    assert tables["addresses"].num_rows == len(swiggy.cache.addresses_ver)
+    subset = exporter.load_tables(
+        fmt=fmt, tables=["orders"], columns={"orders": ["order_time"]}
+    )
+    assert subset["orders"].column_names == ["order_time"]
+    assert subset["orders"]["order_time"].to_pylist() == [o.order_time for o in orders]
+
+
+def test_process_orders_copy_on_write():
+    raw = deepcopy(swiggy.orders_raw)
+    refined = [utils.process_orders(order) for order in swiggy.orders_raw]
+    assert swiggy.orders_raw == raw
+    assert refined == swiggy.orders_refined
+    assert utils.parse_payload('{"ok": true}') == {"ok": True}
+    assert utils.parse_payload("{'ok': true}", booleans=True) == {"ok": True}
+    assert utils.parse_payload("[{'a': None}]") == [{"a": None}]
+
+
+def test_refined_sidecar(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    saved = Swiggy(path=tmp_path, ddav=True)
+    saved.orders_raw = swiggy.orders_raw
+    saved.saveb()
+    saved.loadb()
+    assert saved.orders_refined == swiggy.orders_refined
+    monkeypatch.setattr(utils, "process_orders", None)
+    loaded = Swiggy(path=tmp_path, ddav=True)
+    loaded.loadb()
+    assert loaded.orders_refined == swiggy.orders_refined
+    # a modified store is refined again
+    monkeypatch.undo()
+    saved.orders_raw = saved.orders_raw + [dict(swiggy.orders_raw[0], order_id=1)]
+    saved.saveb()
+    loaded.loadb()
+    assert len(loaded.orders_refined) == len(swiggy.orders_refined) + 1
+    # the sidecar is only written when it is stale, and can't fail a load
+
+    def read_only(fp: Path, orders_refined: Any) -> None:
+        raise PermissionError(fp)
+
+    monkeypatch.setattr(ioh, "save_refined", read_only)
+    loaded.loadb()
+    ioh._refined_path(tmp_path / "data" / "orders.msgpack").unlink()
+    loaded.loadb()
+    assert len(loaded.orders_refined) == len(swiggy.orders_refined) + 1
+
+
+def test_parallel_workers(tmp_path: Path):
+    sharded = Swiggy(path=tmp_path, ddav=True, workers=2)
+    sharded.orders_raw = swiggy.orders_raw
+    sharded.savej()
+    sharded.loadj()
+    assert sharded.orders_refined == swiggy.orders_refined
+    assert sharded.get_orders() == swiggy.get_orders()
+    # records are converted in the workers and pickled back
+    assert sharded.get_records() == swiggy.get_records()
+
+
+def test_memoized_models():
+    orders = swiggy.get_orders()
+    assert orders is not swiggy.get_orders()
+    assert all(a is b for a, b in zip(orders, swiggy.get_orders()))
+    assert [o.dict() for o in orders] == [
+        convert.order(order, swiggy.ddav).dict() for order in swiggy.orders_refined
+    ]
+    assert [i.dict() for i in swiggy.get_items()] == [
+        i.dict() for order in swiggy.orders_refined for i in convert.item(order)
+    ]
+    assert [p.dict() for p in swiggy.get_payments()] == [
+        p.dict() for order in swiggy.orders_refined for p in convert.payment(order)
+    ]
+    with pytest.raises(TypeError):
+        orders[0].order_total = 0
+    reloaded = Swiggy(ddav=True)
+    reloaded.loadj()
+    first = reloaded.get_orders()[0]
+    reloaded.loadj()
+    assert reloaded.get_orders()[0] is not first
+
+
+def test_trusted_models():
+    trusted = Swiggy(ddav=True)
+    trusted.loadj(trusted=True)
+    assert trusted.trusted is True
+    for validated, constructed in zip(swiggy.get_orders(), trusted.get_orders()):
+        assert validated.dict() == constructed.dict()
+    order_id = swiggy.orders_refined[0]["order_id"]
+    assert trusted.get_order(order_id).dict() == swiggy.get_order(order_id).dict()
+    trusted.loadj()
+    assert trusted.trusted is False
+
+
+def test_order_records():
+    records = swiggy.get_records()
+    assert all(a is b for a, b in zip(records, swiggy.get_records()))
+    for record, order in zip(records, swiggy.get_orders()):
+        assert record.order_id == order.order_id
+        assert record.order_time == order.order_time
+        assert record.order_total == order.order_total
+        assert record.distance == order.restaurant.customer_distance[1]
+        assert record.on_time is order.on_time
+        assert record.restaurant_name == order.restaurant.name
+        assert record.address_id == order.address.address_id
+        assert record.address_city == order.address.city
+    cities = {record.address_city: record.address_city for record in records}
+    assert all(record.address_city is cities[record.address_city] for record in records)
+    with pytest.raises(TypeError):
+        records[0].order_total = 0
+    assert not hasattr(records[0], "__dict__")
+
+
+def test_distinct_entities(tmp_path: Path):
+    without_ver = Swiggy(ddav=False)
+    without_ver.loadj()
+    for swiggy_ in (swiggy, without_ver):
+        for distinct, models in (
+            (swiggy_.get_distinct_items(), swiggy_.get_items()),
+            (swiggy_.get_distinct_restaurants(), swiggy_.get_restaurants()),
+            (swiggy_.get_distinct_addresses(), swiggy_.get_addresses()),
+        ):
+            counts = Counter(models)
+            assert [(e.model, e.count) for e in distinct] == list(counts.items())
+            firsts = {}
+            for model in models:
+                firsts.setdefault(model, model)
+            for e in distinct:
+                first = firsts[e.model].dict(exclude={"cuisine"})
+                assert e.model.dict(exclude={"cuisine"}) == first
+    for entity in swiggy.get_distinct_restaurants():
+        orders = [swiggy.get_order(order_id) for order_id in entity.order_ids]
+        assert all(order.restaurant == entity.model for order in orders)
+        assert entity.model.cuisine == set().union(
+            *(order.restaurant.cuisine for order in orders)
+        )
+    # each version of an address is a distinct address with ddav
+    distinct_addresses = len(swiggy.get_distinct_addresses())
+    assert distinct_addresses >= len(without_ver.get_distinct_addresses())
+    for distinct, models in (
+        (swiggy.get_distinct_items(ranked=True), swiggy.get_items()),
+        (swiggy.get_distinct_restaurants(ranked=True), swiggy.get_restaurants()),
+    ):
+        counts = Counter(models).most_common()
+        assert [(e.model, e.count) for e in distinct] == counts
+    saved = Swiggy(path=tmp_path, ddav=True)
+    saved.orders_raw = swiggy.orders_raw
+    saved.orders_refined = swiggy.orders_refined
+    saved.saves()
+    loaded = Swiggy(path=tmp_path, ddav=True)
+    loaded.loads()
+    assert loaded.get_distinct_items() == swiggy.get_distinct_items()
+    assert loaded.get_distinct_addresses() == swiggy.get_distinct_addresses()
+
+
+def test_pickle(tmp_path: Path):
+    saved = Swiggy(path=tmp_path, ddav=True)
+    saved.orders_raw = swiggy.orders_raw
+    saved.orders_refined = swiggy.orders_refined
+    saved.saves()
+    loaded = Swiggy(path=tmp_path, ddav=True)
+    loaded.loads()
+    loaded._cookie_jar
+    copy = pickle.loads(pickle.dumps(loaded))
+    assert "_cookie_jar" not in copy.__dict__ and copy._client is None
+    order = swiggy.get_orders()[0]
+    assert copy.get_order(order.order_id) == order
+    assert (
+        pickle.loads(pickle.dumps(swan)).orders.aggregate() == swan.orders.aggregate()
+    )